@@ -70,15 +70,18 @@ managers = [
 def spacePred(seq, *args, **kwargs):
     """
     Testing of all implemented predictors using Managers.
+
+    Information spaces are built once and replayed from the space store.
     """
     print('*' * 27)
+    feeder = feed.SpaceFeederStore(bd.OneDBuildBatch, sequencer=sequencer,
+                                   startidx=seqstart)
     for manager in managers:
         print("{:27}".format(manager.name))
         for preds in [predictors, mixed]:
             for predictor in preds:
                 m = manager(predictor, vptpow=12)
                 try:
-                    feeder = feed.SpaceFeeder1DMA("")
                     agg = mgt.Aggregate(feeder, m, 1, **kwargs)
                     pname, parr = agg.feed(seq)
                     res = sb.XOR.subtract(parr, iarr)
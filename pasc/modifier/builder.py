@@ -2,11 +2,16 @@
 # coding: utf-8
 """Build modifier for Infospace extraction of Sequence."""
 
-from itertools import chain
+import os
+from itertools import chain, combinations
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.sharedctypes import RawArray
 # from pasc.backend import BaseBuilder
-from pasc.objects.sequence import Sequence  # Input
+from pasc.objects.sequence import Sequence, IndexSequence  # Input
 from pasc.objects.informationspace import InformationSpace  # Output
+from pasc.objects.informationspace import LazyInformationSpace
+from pasc.objects.informationspace import PackedInformationSpaces
 from pasc.objects.informationcontext import InformationContext as IC
 from pasc.toolbox import flood as fl
 import numpy as np
@@ -110,7 +115,8 @@ import numpy as np
 class GeneralBuild:
 
     @staticmethod
-    def build_infospace(array, searchval=None, searchidx=None, restriction=None):
+    def build_infospace(array, searchval=None, searchidx=None, restriction=None,
+                        lazy=False):
         intnan = fl.getNAN(array.dtype)
         if searchval:
             origin = np.argwhere(array == searchval)[0]
@@ -118,13 +124,52 @@ class GeneralBuild:
             origin = np.unravel_index(searchidx, array.shape)
         else:
             raise Exception("No value or index given.")
-        sval = array[tuple(origin)]
-        if restriction is not None:
-            array = _getSubssetInRangeOf(array, restriction, sval)
-        spacedict = _buildInfoSpace(arr=array, val=sval)
+        origin = tuple(int(x) for x in origin)
+        sval = array[origin]
+        if lazy:
+            return _lazyInfoSpace(array.copy(), sval, intnan,
+                                  restriction=restriction, origin=origin)
+        spacedict = _buildInfoSpace(arr=array, val=sval,
+                                    restriction=restriction, origin=origin)
         space = _set_searchval_to_intnan(spacedict, sval, intnan)
         return space
 
+class IncrementalBuild:
+    """Builder for the information spaces of consecutive sequence steps.
+
+    Contrary to `GeneralBuild` the known cells are kept between the steps
+    together with their runs along each axis. The fence around the search
+    index is looked up from these runs, so only the region around the
+    newly revealed cell is touched. Results are the same as of
+    `GeneralBuild.build_infospace` on the full array.
+    """
+
+    def __init__(self, shape, dtype, restriction=None):
+        self.nan = fl.getNAN(np.dtype(dtype))
+        self.array = np.full(shape, self.nan, dtype=dtype)
+        self.runs = fl.KnownRuns(shape)
+        self.restriction = restriction
+
+    def reveal(self, searchidx, value):
+        """Set value of cell at `searchidx` as known."""
+        origin = np.unravel_index(searchidx, self.array.shape)
+        self.array[origin] = value
+        if value != self.nan:
+            self.runs.reveal(origin)
+
+    def build_infospace(self, searchidx, searchval, lazy=False):
+        origin = np.unravel_index(searchidx, self.array.shape)
+        slices = fl.fenceSlices(origin, self.runs.extent(origin),
+                                self.array.shape, self.restriction)
+        array = self.array[slices].copy()
+        origin = tuple(int(x - s.start) for x, s in zip(origin, slices))
+        array[origin] = searchval
+        if lazy:
+            return _lazyInfoSpace(array, searchval, self.nan, origin=origin)
+        spacedict = _buildInfoSpace(arr=array, val=searchval, origin=origin)
+        return _set_searchval_to_intnan(spacedict, searchval, self.nan)
+
+
 #
 # class OneDBuild:
 #
@@ -185,7 +230,7 @@ def _set_searchval_to_intnan(ispace, searchval, intnan, **info):
         for arr in arrs:
             j = arr.copy()
             j[np.where(j == searchval)] = intnan
-            tmp.append(IC.create(data=j, **info))
+            tmp.append(IC.create(data=j, owned=True, **info))
         result[dim] = tmp
     return InformationSpace(result)
 
@@ -234,18 +279,10 @@ def _set_searchval_to_intnan(ispace, searchval, intnan, **info):
 #         return ispace
 
 
-def _getSubssetInRangeOf(data, r, value):
-    coords = np.array([x[0] for x in np.where(data == value)])
-    lower = np.array([max(a, b)
-                      for a, b in zip([0] * coords.size, coords - r)])
-    upper = np.array([min(a, b) for a, b in zip(data.shape, coords + r)])
-    subset = data[[slice(x, y + 1, None) for x, y in zip(lower, upper)]]
-    return subset  # .copy()
-
-
-def _buildInfoSpace(arr, val, squeeze=True):
+def _buildInfoSpace(arr, val, squeeze=True, restriction=None, origin=None):
     """Build Infospace"""
-    blocks = fl.getBlocks(arr, val)  # blocks of different dimensions
+    # blocks of different dimensions
+    blocks = fl.getBlocks(arr, val, restriction=restriction, origin=origin)
     test = fl.ndimDict(blocks)  # dictionary of blocks with ndim as keys
     chained = chain(*[v for k, v in test.items()])  # reduction of nested lists
     reduced = [fl.reduceTill(ar, val, squeeze=squeeze) for ar in chained]
@@ -265,6 +302,58 @@ def _buildInfoSpace(arr, val, squeeze=True):
         infospace[i] = np.array([], dtype=int)
     return infospace
 
+
+def _lazyInfoSpace(arr, val, intnan, restriction=None, origin=None):
+    """InformationSpace of `_buildInfoSpace` computing dimensions on access.
+
+    Contexts of a dimension are the same as of `_buildInfoSpace` (up to
+    their order). The blocks around `val` are only searched if a dimension
+    above one is accessed, 1D contexts come from the runs through `val`.
+    """
+    if origin is None:
+        origin = np.argwhere(arr == val)[0]
+    origin = tuple(int(x) for x in origin)
+    blocks = []
+
+    def method(dim):
+        if dim > 1 and not blocks:
+            blocks.extend(fl.getBlocks(arr, val, restriction=restriction,
+                                       origin=origin))
+        arrs = _buildDimension(arr, val, dim, origin, restriction, blocks)
+        return _set_searchval_to_intnan({dim: arrs}, val, intnan)[dim]
+    return LazyInformationSpace(range(arr.ndim + 1), method)
+
+
+def _buildDimension(arr, val, dim, origin, restriction=None, blocks=()):
+    """Contexts of dimension `dim` through `val` at `origin` of `arr`."""
+    if dim == 0:
+        return [np.array([val], dtype=int)]
+    subs = list()
+    if dim == 1:
+        # Lines of all blocks are subsets of the runs through val
+        for axis, x in enumerate(origin):
+            lower, upper = 0, arr.shape[axis]
+            if restriction is not None:
+                lower = max(0, x - restriction)
+                upper = min(upper, x + restriction + 1)
+            line = origin[:axis] + (slice(lower, upper),) + origin[axis + 1:]
+            known = arr[line] != fl.getNAN(arr.dtype)
+            first, last = fl.runExtent(known, x, lower)
+            if last > first:
+                line = origin[:axis] + (slice(first, last + 1),) + \
+                    origin[axis + 1:]
+                subs.append(arr[line])
+    else:
+        for block in blocks:
+            pos = [int(x[0]) for x in np.where(block == val)]
+            axes = [i for i, n in enumerate(block.shape) if n > 1]
+            for keep in combinations(axes, dim):
+                subs.append(block[tuple(slice(None) if i in keep else x
+                                        for i, x in enumerate(pos))])
+    if not subs:
+        return np.array([], dtype=int)
+    return fl.uniqueNDsAndSuper(subs)
+
 #
 # class OneDBuildMA:
 #
@@ -355,6 +444,299 @@ class OneDBuildMA:
                                 min(source + restriction, array[x].size) + 1)]
             if tmp.data[tmp.mask == False].size > 1:
                 data = tmp.data[tmp.mask == False]
-                result.append(IC.create(data=data, id=(i,), size=data.size))
+                result.append(IC.create(data=data, owned=True, id=(i,),
+                                        size=data.size))
         ispace = InformationSpace({1: IC(result)})
         return ispace
+
+
+class OneDBuildMask:
+    """`OneDBuildMA` on a plain data array and a boolean known-mask.
+
+    Cells are revealed step by step. The contexts of the search index are
+    compressed from the known cells of each axis line into preallocated
+    per-axis scratch buffers (`IC.create` interns, i.e. copies them), so
+    no masked arrays or full line copies are created per step.
+    """
+
+    def __init__(self, shape, dtype, restriction=None):
+        self.shape = tuple(shape)
+        self.restriction = restriction
+        self.nan = fl.getNAN(dtype)
+        self.data = np.zeros(self.shape, dtype=dtype)
+        self.known = np.zeros(self.shape, dtype=bool)
+        self._scratch = [np.empty(n, dtype=dtype) for n in self.shape]
+
+    def reveal(self, searchidx, value):
+        """Set cell `searchidx` known with `value`."""
+        origin = np.unravel_index(searchidx, self.shape)
+        self.data[origin] = value
+        self.known[origin] = True
+
+    def build_infospace(self, searchidx):
+        """InformationSpace of 1D contexts through (known) cell `searchidx`."""
+        origin = np.unravel_index(searchidx, self.shape)
+        result = []
+        for i, n in enumerate(self.shape):
+            source = origin[i]
+            lower, upper = 0, n
+            if self.restriction is not None:
+                lower = max(source - self.restriction, 0)
+                upper = min(source + self.restriction + 1, n)
+            line = origin[:i] + (slice(lower, upper),) + origin[i + 1:]
+            known = self.known[line]
+            size = np.count_nonzero(known)
+            if size <= 1:
+                continue
+            data = np.compress(known, self.data[line],
+                               out=self._scratch[i][:size])
+            data[np.count_nonzero(known[:source - lower])] = self.nan
+            result.append(IC.create(data=data, id=(i,), size=size))
+        return InformationSpace({1: IC(result)})
+
+
+class OneDBuildBatch:
+    """Batch version of `OneDBuildMA` for all steps of a sequence.
+
+    The cells known at step `t` are exactly the cells with a visit rank
+    lower than `t`. Using the rank array of the sequence the 1D contexts
+    of all steps and axes are built vectorized (in chunks of steps)
+    instead of masking the array step by step.
+    """
+
+    chunksize = 2**22
+
+    @classmethod
+    def build_infospaces(cls, seq, restriction=None, start=0, stop=None):
+        """Information spaces of steps `start:stop` of an IndexSequence.
+
+        Returns
+        =======
+        result : PackedInformationSpaces
+            Same contexts as `OneDBuildMA` for each step of `seq`.
+        """
+        shape = seq.shape
+        size = int(np.prod(shape))
+        rank = np.full(size, size, dtype=np.int64)
+        rank[seq.sequence] = np.arange(seq.sequence.size)
+        values = np.full(size, fl.getNAN(seq.dtype), dtype=seq.dtype)
+        values[seq.sequence] = seq.data
+
+        windows = [n - 1 if restriction is None else min(restriction, n - 1)
+                   for n in shape]
+        width = 2 * max(windows) + 1
+        step = max(1, cls.chunksize // (width * len(shape)))
+        stop = seq.sequence.size if stop is None else stop
+        chunks = [_oneDChunk(seq.sequence, x, min(step, stop - x), shape,
+                             rank, values, windows)
+                  for x in range(start, stop, step)]
+        return concatPacked(chunks, seq.dtype, dims=(1,))
+
+
+def _oneDChunk(sequence, start, count, shape, rank, values, windows):
+    """Packed 1D contexts of steps `start:start + count` of a sequence."""
+    idx = sequence[start:start + count]
+    steps = np.arange(start, start + idx.size)
+    coords = np.unravel_index(idx, shape)
+    strides = np.cumprod((1,) + shape[:0:-1])[::-1]
+    nan = fl.getNAN(values.dtype)
+
+    counts, known, data, nanpos = [], [], [], []
+    for axis, (n, r) in enumerate(zip(shape, windows)):
+        offset = np.arange(-r, r + 1)
+        pos = coords[axis][:, np.newaxis] + offset
+        inside = (pos >= 0) & (pos < n)
+        neighbours = np.where(inside, idx[:, np.newaxis] + offset * strides[axis], 0)
+        mask = inside & (rank[neighbours] <= steps[:, np.newaxis])
+        vals = values[neighbours]
+        vals[:, r] = nan
+        counts.append(mask.sum(axis=1))
+        known.append(mask)
+        data.append(vals)
+        nanpos.append(mask[:, :r].sum(axis=1))
+
+    counts = np.stack(counts, axis=1)  # steps x axes
+    keep = counts > 1
+    sizes = counts[keep]
+    offsets = np.zeros(sizes.size + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    ctxid = np.cumsum(keep.ravel()).reshape(keep.shape) - 1
+
+    result = np.empty(offsets[-1], dtype=values.dtype)
+    for axis, (mask, vals) in enumerate(zip(known, data)):
+        rows = keep[:, axis]
+        mask, vals = mask[rows], vals[rows]
+        dest = offsets[ctxid[rows, axis]][:, np.newaxis] + np.cumsum(mask, axis=1) - 1
+        result[dest[mask]] = vals[mask]
+
+    stepptr = np.zeros(idx.size + 1, dtype=np.int64)
+    np.cumsum(keep.sum(axis=1), out=stepptr[1:])
+    axes = np.broadcast_to(np.arange(len(shape)), keep.shape)[keep]
+    nanpos = np.stack(nanpos, axis=1)[keep]
+    return PackedInformationSpaces(result, offsets, nanpos, axes, stepptr)
+
+
+class GeneralBuildBatch:
+    """Batch version of `GeneralBuild` for the steps of a sequence.
+
+    The cells known at step `t` are exactly the cells with a visit rank
+    lower than `t`. Instead of masking the whole array at each step only
+    the fence around the search index is taken from the rank array. The
+    contexts of all steps end up in packed (memory mappable) buffers, so
+    they can be built once, e.g. in parallel chunks of steps, and are
+    replayed later.
+    """
+
+    @staticmethod
+    def build_infospaces(seq, restriction=None, start=0, stop=None):
+        """Information spaces of steps `start:stop` of an IndexSequence.
+
+        Returns
+        =======
+        result : PackedInformationSpaces
+            Same contexts as `SpaceFeederGen` for each step of `seq`.
+        """
+        shape = seq.shape
+        size = int(np.prod(shape))
+        nan = fl.getNAN(seq.dtype)
+        fillvalue = np.max(seq.data) + 1
+        rank = np.full(size, size, dtype=np.int64)
+        rank[seq.sequence] = np.arange(seq.sequence.size)
+        rank = rank.reshape(shape)
+        values = np.full(size, nan, dtype=seq.dtype)
+        values[seq.sequence] = seq.data
+        values = values.reshape(shape)
+
+        stop = seq.sequence.size if stop is None else stop
+        data, shapes, nanpos, counts = list(), list(), list(), list()
+        for t in range(start, stop):
+            origin = np.unravel_index(seq.sequence[t], shape)
+            origin = tuple(int(x) for x in origin)
+            extent = [_rankExtent(rank, origin, d, t, restriction)
+                      for d in range(len(shape))]
+            box = fl.fenceSlices(origin, extent, shape, restriction)
+            local = np.where(rank[box] < t, values[box], nan)
+            localorigin = tuple(x - s.start for x, s in zip(origin, box))
+            local[localorigin] = fillvalue
+            space = _buildInfoSpace(arr=local, val=fillvalue,
+                                    origin=localorigin)
+            count = 0
+            for dim in sorted(space):
+                for arr in space[dim]:
+                    if arr.size <= 1:
+                        continue
+                    position = np.flatnonzero(arr == fillvalue)
+                    arr = arr.astype(seq.dtype)
+                    arr.flat[position] = nan
+                    data.append(arr.ravel())
+                    shapes.append(arr.shape + (0,) * (len(shape) - arr.ndim))
+                    nanpos.append(position[0])
+                    count += 1
+            counts.append(count)
+
+        offsets = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum([x.size for x in data], out=offsets[1:])
+        stepptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=stepptr[1:])
+        values = np.concatenate(data) if data else np.array([], seq.dtype)
+        return PackedInformationSpaces(
+            values.astype(seq.dtype), offsets,
+            np.array(nanpos, dtype=np.int64),
+            np.full(len(data), -1, dtype=np.int64), stepptr,
+            np.array(shapes, dtype=np.int64).reshape(-1, len(shape)),
+            dims=range(len(shape) + 1))
+
+
+def _rankExtent(rank, origin, dim, step, restriction=None):
+    """Run of cells known at `step` through `origin` along `dim`."""
+    x, n = origin[dim], rank.shape[dim]
+    if restriction is not None:
+        lower, upper = max(0, x - restriction), min(n, x + restriction + 1)
+    else:
+        lower, upper = 0, n
+    line = rank[origin[:dim] + (slice(lower, upper),) + origin[dim + 1:]]
+    return fl.runExtent(line <= step, x, lower)
+
+
+def build_parallel(builder, seq, restriction=None, processes=None):
+    """Information spaces of `seq` built by `builder` in a process pool.
+
+    The spaces of a step only depend on the cells known at that step, so
+    the batch `builder` (e.g. `OneDBuildBatch` or `GeneralBuildBatch`)
+    builds disjoint step ranges in worker processes. Sequence and data are
+    handed to the workers once as shared memory, the packed results are
+    concatenated in order.
+
+    Arguments
+    =========
+    builder : class
+        Batch builder with `build_infospaces(seq, restriction, start, stop)`.
+    seq : IndexSequence
+        Sequence of the IntegerArray.
+    restriction : int
+        Restriction of the builder.
+    processes : int
+        Number of worker processes (all cores if None).
+
+    Returns
+    =======
+    result : PackedInformationSpaces
+    """
+    processes = processes or os.cpu_count() or 1
+    size = seq.sequence.size
+    bounds = np.linspace(0, size, min(size, 4 * processes) + 1).astype(int)
+    ranges = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+    if processes == 1 or len(ranges) <= 1:
+        return builder.build_infospaces(seq, restriction)
+    shared = (_toShared(seq.sequence), _toShared(seq.data), seq.shape)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_initShared,
+                             initargs=shared) as pool:
+        chunks = list(pool.map(_buildRange, [builder] * len(ranges),
+                               [restriction] * len(ranges), *zip(*ranges)))
+    return concatPacked(chunks, seq.dtype, chunks[0].dims)
+
+
+_SHARED = None
+
+
+def _toShared(array):
+    """Shared memory copy of `array` (with its dtype)."""
+    array = np.ascontiguousarray(array)
+    buffer = RawArray('b', max(1, array.nbytes))
+    np.frombuffer(buffer, dtype=np.int8)[:array.nbytes] = \
+        array.view(np.int8).ravel()
+    return buffer, array.dtype.str, array.size
+
+
+def _initShared(sequence, data, shape):
+    """Set up the IndexSequence shared with worker processes."""
+    global _SHARED
+    sequence, data = [np.frombuffer(buffer, dtype=dtype, count=count)
+                      for buffer, dtype, count in (sequence, data)]
+    _SHARED = IndexSequence(sequence, tuple(shape), data)
+
+
+def _buildRange(builder, restriction, start, stop):
+    """Packed information spaces of steps `start:stop` of the shared sequence."""
+    return builder.build_infospaces(_SHARED, restriction, start, stop)
+
+
+def concatPacked(chunks, dtype, dims):
+    """Concatenate packed information spaces of consecutive steps."""
+    if not chunks:
+        empty = np.zeros(1, dtype=np.int64)
+        return PackedInformationSpaces(np.array([], dtype=dtype), empty,
+                                       empty[:0], empty[:0], empty, dims=dims)
+    values = np.concatenate([x.values for x in chunks])
+    offsets = np.concatenate([[0]] + [x.offsets[1:] + y for x, y in zip(
+        chunks, np.cumsum([0] + [x.values.size for x in chunks[:-1]]))])
+    stepptr = np.concatenate([[0]] + [x.stepptr[1:] + y for x, y in zip(
+        chunks, np.cumsum([0] + [x.nanpos.size for x in chunks[:-1]]))])
+    nanpos = np.concatenate([x.nanpos for x in chunks])
+    axes = np.concatenate([x.axes for x in chunks])
+    shapes = None
+    if chunks[0].shapes is not None:
+        shapes = np.concatenate([x.shapes for x in chunks])
+    return PackedInformationSpaces(values, offsets.astype(np.int64), nanpos,
+                                   axes, stepptr.astype(np.int64), shapes,
+                                   dims)
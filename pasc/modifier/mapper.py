@@ -7,62 +7,141 @@ from pasc.backend import BaseMapper
 from pasc.objects.floatarray import FloatArray  # Input
 from pasc.objects.integerarray import IntegerArray  # Output
 import numpy as np
-from bitstring import BitArray as ba
 
 
 class RawBinary(BaseMapper):
-    """Raw binary mapper. Reads float binary and interprets it as integer."""
+    """Raw binary mapper. Reads float binary and interprets it as integer.
+
+    The binary is reinterpreted via a dtype view, i.e. no element wise
+    conversion is taking place. If no `out` buffer is given the resulting
+    IntegerArray shares its memory with the (native byte order) input.
+    """
 
     name = "RawBinary"
 
     @staticmethod
-    def map(floatarray):
-        if not isinstance(floatarray, FloatArray):
-            err_type = "Expected FloatArray, got {}".format(type(floatarray))
-            raise TypeError(err_type)
-        if floatarray.array.dtype in (np.float32,):
-            i, o, d = ('>f', '>l', np.int32)
-        elif floatarray.array.dtype in (np.float64, float,):
-            i, o, d = ('>d', '>Q', np.int64)
-        else:
-            err_msg = 'Expected 32 or 64 bits, got {}'.format(floatarray.array.dtype)
-            raise TypeError(err_msg)
-        data = _vraw(floatarray.array, i, o).astype(d)
+    def map(floatarray, out=None):
+        floatarray = _check_input(floatarray, FloatArray)
+        _, itype, _ = _dtypes(floatarray.array.dtype)
+        data = _reinterpret(floatarray.array, itype, out)
         return IntegerArray(data)
 
+    @staticmethod
+    def unmap(integerarray, out=None):
+        integerarray = _check_input(integerarray, IntegerArray)
+        ftype, _, _ = _dtypes(integerarray.array.dtype)
+        data = _reinterpret(integerarray.array, ftype, out)
+        return FloatArray(data)
+
+
 def _raw(value, itype, otype):
+    """Scalar reference implementation of RawBinary using struct."""
     s = struct.pack(itype, value)
     return struct.unpack(otype, s)[0]
-_vraw = np.vectorize(_raw)
 
 
 class Lindstrom(BaseMapper):
-    """Map float to uint with saving order (based on Lindstrom et al. 2004)."""
+    """Map float to uint with saving order (based on Lindstrom et al. 2004).
+
+    The binary of each float is XOR'ed with the binary of `2.`. Afterwards
+    all bits of negative values and the sign bit of all other values are
+    inverted. The transformation is done bitwise on the whole array.
+    """
 
     name = "Lindstrom"
 
     @staticmethod
-    def map(floatarray):
-        if not isinstance(floatarray, FloatArray):
-            err_type = "Expected FloatArray, got {}".format(type(floatarray))
-            raise TypeError(err_type)
-        if floatarray.array.dtype in (np.float32,):
-            length, d = 32, np.uint32
-        elif floatarray.array.dtype in (np.float64, float,):
-            length, d = 64, np.uint64
-        else:
-            err_msg = 'Expected 32 or 64 bits, got {}'.format(floatarray.array.dtype)
-            raise TypeError(err_msg)
-        data = _vlindstrom(floatarray.array, length).astype(d)
+    def map(floatarray, out=None):
+        floatarray = _check_input(floatarray, FloatArray)
+        ftype, _, utype = _dtypes(floatarray.array.dtype)
+        sign, two = _lindstrom_constants(ftype, utype)
+        data = np.bitwise_xor(_reinterpret(floatarray.array, utype), two,
+                              out=_check_out(out, utype, floatarray.shape))
+        np.bitwise_xor(data, sign, out=data)
+        np.bitwise_xor(data, ~sign, out=data, where=floatarray.array < 0)
         return IntegerArray(data)
 
+    @staticmethod
+    def unmap(integerarray, out=None):
+        integerarray = _check_input(integerarray, IntegerArray)
+        ftype, _, utype = _dtypes(integerarray.array.dtype)
+        sign, two = _lindstrom_constants(ftype, utype)
+        data = _reinterpret(integerarray.array, utype)
+        out = _check_out(out, ftype, data.shape)
+        result = np.bitwise_xor(data, sign ^ two,
+                                out=None if out is None else out.view(utype))
+        # Cleared sign bit marks a negative value if inverting yields one
+        negative = (result ^ ~sign).view(ftype) < 0
+        negative &= (data & sign) == 0
+        np.bitwise_xor(result, ~sign, out=result, where=negative)
+        return FloatArray(result.view(ftype))
+
 
 def _lindstrom(value, length):
+    """Scalar reference implementation of Lindstrom using bitstring."""
+    from bitstring import BitArray as ba
     result = ba(floatbe=value, length=length) ^ ba(floatbe=2, length=length)
     if value < 0:
         result.invert()
     else:
         result.invert(0)
     return result.uintbe
-    # return result.U
-_vlindstrom = np.frompyfunc(_lindstrom, 2, 1)
+
+
+def _lindstrom_constants(ftype, utype):
+    """Sign bit and binary of `2.` as unsigned integer."""
+    sign = utype.type(1 << (8 * utype.itemsize - 1))
+    two = np.array(2, dtype=ftype).view(utype)[()]
+    return sign, two
+
+
+def _check_input(obj, clas):
+    if not isinstance(obj, clas):
+        err_type = "Expected {}, got {}".format(clas.__name__, type(obj))
+        raise TypeError(err_type)
+    return obj
+
+
+def _dtypes(dtype):
+    """Float, signed and unsigned integer dtypes of same bit length."""
+    if dtype.itemsize == 4:
+        return np.dtype(np.float32), np.dtype(np.int32), np.dtype(np.uint32)
+    elif dtype.itemsize == 8:
+        return np.dtype(np.float64), np.dtype(np.int64), np.dtype(np.uint64)
+    err_msg = 'Expected 32 or 64 bits, got {}'.format(dtype)
+    raise TypeError(err_msg)
+
+
+def _reinterpret(array, dtype, out=None):
+    """Reinterpret the binary of `array` as `dtype` in native byte order.
+
+    Arguments
+    =========
+    array : np.ndarray
+        Array to be reinterpreted. Byte order is taken into account.
+    dtype : np.dtype
+        Target dtype with the same itemsize as `array`.
+    out : np.ndarray
+        Optional buffer of `dtype` and same shape as `array` to write into.
+
+    Returns
+    =======
+    result : np.ndarray
+        Either a view on `array` (native byte order), a byte swapped copy
+        (non-native byte order) or `out`.
+    """
+    view = array.view(dtype.newbyteorder(array.dtype.byteorder))
+    if out is None:
+        return view.astype(dtype, copy=False)
+    out = _check_out(out, dtype, array.shape)
+    np.copyto(out, view, casting='equiv')
+    return out
+
+
+def _check_out(out, dtype, shape):
+    """Check that `out` buffer (if any) fits `dtype` and `shape`."""
+    if out is not None and (out.dtype != dtype or out.shape != shape):
+        err_msg = "Expected out buffer of {} {}, got {} {}".format(
+            dtype, shape, out.dtype, out.shape)
+        raise ValueError(err_msg)
+    return out
@@ -6,7 +6,8 @@ from pasc.backend import BaseSequencer
 from pasc.objects.integerarray import IntegerArray  # Input
 from pasc.objects.sequence import IndexSequence  # Output
 # from pasc.toolbox import graphtheory as gt
-from pasc.toolbox import bfs
+from pasc.toolbox import bfs, curves
+from pasc.toolbox.cache import orders
 import numpy as np
 
 
@@ -20,6 +21,30 @@ def _check_input(startnode, integerarray):
     return startnode, integerarray
 
 
+def _index_dtype(size):
+    """Smallest integer dtype able to address `size` elements."""
+    return np.int32 if size <= np.iinfo(np.int32).max else np.int64
+
+
+def _traverse(name, method, shape, startidx, **kwargs):
+    """Cached traversal order of `method` for given shape and start index."""
+    def compute():
+        order = method(shape=shape, startidx=startidx, **kwargs)
+        if isinstance(order, np.ndarray):
+            return order
+        return np.fromiter(order, dtype=np.int64)
+    key = (name, tuple(shape), startidx) + tuple(sorted(kwargs.items()))
+    return orders.get(key, compute)
+
+
+def _bfs(method):
+    """Order of a weighted BFS method (dropping the start index)."""
+    def wrapper(**kwargs):
+        _, order = method(**kwargs)
+        return order
+    return wrapper
+
+
 class Linear(BaseSequencer):
     """Linear output sequence for N dimensional arrays."""
 
@@ -29,20 +54,22 @@ class Linear(BaseSequencer):
     def flatten(startnode, integerarray, order=None):
         startnode, integerarray = _check_input(startnode, integerarray)
         shape = integerarray.array.shape
-        tmpdata = np.arange(np.prod(shape)).reshape(shape)
-        nodenames = (tmpdata + 1).astype(str)
+        size = integerarray.array.size
+        indices = np.arange(size, dtype=_index_dtype(size)).reshape(shape)
         if not order or order in ('c', 'C'):
-            new = nodenames.copy()
+            axes = tuple(range(len(shape)))
         elif order in ('f', 'F'):
-            new = np.transpose(nodenames).copy()
+            axes = tuple(reversed(range(len(shape))))
         else:
-            new = np.transpose(nodenames, order).copy()
-
-        startidx = np.where(new.flat == startnode)[0][0]
-        nodelist = np.roll(new.flat, -startidx)#.flatten()#.tolist()
-        seq = nodelist.astype(np.int32) - 1
-        data = np.array([integerarray.array.flat[x] for x in seq],
-                        dtype=integerarray.array.dtype)
+            axes = tuple(order)
+        new = np.transpose(indices, axes)
+
+        startcoord = np.unravel_index(int(startnode) - 1, shape)
+        startidx = np.ravel_multi_index([startcoord[x] for x in axes],
+                                        new.shape)
+        flat = new.ravel()
+        seq = np.concatenate([flat[startidx:], flat[:startidx]])
+        data = np.take(integerarray.array, seq)
         return IndexSequence(seq, shape, data, order=order)
 
 
@@ -64,9 +91,10 @@ class Chequerboard(BaseSequencer):
         startnode, integerarray = _check_input(startnode, integerarray)
         shape = integerarray.array.shape
 
-        _, seq = bfs.BFSCheq(shape=shape, startidx=int(startnode)-1, weights=weights)
-        data = np.array([integerarray.array.flat[x] for x in seq])
-        return IndexSequence(list(seq), shape, data)
+        seq = _traverse('Chequerboard', _bfs(bfs.BFSCheq), shape,
+                        int(startnode)-1, weights=weights)
+        data = np.take(integerarray.array, seq)
+        return IndexSequence(seq, shape, data)
 
 
 class ChequerboardC(BaseSequencer):
@@ -84,9 +112,9 @@ class ChequerboardC(BaseSequencer):
         shape = integerarray.shape
         if len(shape) == 1:
             raise ValueError("Incorrect input")
-        seq = bfs.CheqNoWeights(shape=shape, startidx=int(startnode)-1)
-        seq = list(seq)
-        data = np.array([integerarray.array.flat[x] for x in seq])
+        seq = _traverse('ChequerboardC', bfs.CheqNoWeights, shape,
+                        int(startnode)-1)
+        data = np.take(integerarray.array, seq)
         return IndexSequence(seq, shape, data)
 
 
@@ -103,9 +131,8 @@ class BlockC(BaseSequencer):
         _ = weights
         startnode, integerarray = _check_input(startnode, integerarray)
         shape = integerarray.shape
-        seq = bfs.BlocNoWeights(shape=shape, startidx=int(startnode)-1)
-        seq = list(seq)
-        data = np.array([integerarray.array.flat[x] for x in seq])
+        seq = _traverse('BlockC', bfs.BlocNoWeights, shape, int(startnode)-1)
+        data = np.take(integerarray.array, seq)
         return IndexSequence(seq, shape, data)
 
 class BlossomC(BaseSequencer):
@@ -121,9 +148,8 @@ class BlossomC(BaseSequencer):
         _ = weights
         startnode, integerarray = _check_input(startnode, integerarray)
         shape = integerarray.shape
-        seq = bfs.BlosNoWeights(shape=shape, startidx=int(startnode)-1)
-        seq = list(seq)
-        data = np.array([integerarray.array.flat[x] for x in seq])
+        seq = _traverse('BlossomC', bfs.BlosNoWeights, shape, int(startnode)-1)
+        data = np.take(integerarray.array, seq)
         return IndexSequence(seq, shape, data)
 
 class Block(BaseSequencer):
@@ -139,9 +165,10 @@ class Block(BaseSequencer):
         startnode, integerarray = _check_input(startnode, integerarray)
         shape = integerarray.array.shape
 
-        _, seq = bfs.BFSBloc(shape=shape, startidx=int(startnode)-1, weights=weights)
-        data = np.array([integerarray.array.flat[x] for x in seq])
-        return IndexSequence(list(seq), shape, data)
+        seq = _traverse('Block', _bfs(bfs.BFSBloc), shape,
+                        int(startnode)-1, weights=weights)
+        data = np.take(integerarray.array, seq)
+        return IndexSequence(seq, shape, data)
 
 class Blossom(BaseSequencer):
     """Sequencer in the shape of a blossom."""
@@ -156,9 +183,46 @@ class Blossom(BaseSequencer):
         startnode, integerarray = _check_input(startnode, integerarray)
         shape = integerarray.array.shape
 
-        _, seq = bfs.BFSBlos(shape=shape, startidx=int(startnode)-1, weights=weights)
-        data = np.array([integerarray.array.flat[x] for x in seq])
-        return IndexSequence(list(seq), shape, data)
+        seq = _traverse('Blossom', _bfs(bfs.BFSBlos), shape,
+                        int(startnode)-1, weights=weights)
+        data = np.take(integerarray.array, seq)
+        return IndexSequence(seq, shape, data)
+
+
+class Morton(BaseSequencer):
+    """Sequencer following a Morton (Z-order) space filling curve.
+
+    Weights argument will be ignored.
+    """
+
+    name = "Morton"
+
+    @staticmethod
+    def flatten(startnode, integerarray, weights=None):
+        _ = weights
+        startnode, integerarray = _check_input(startnode, integerarray)
+        shape = integerarray.shape
+        seq = _traverse('Morton', curves.MortonOrder, shape, int(startnode)-1)
+        data = np.take(integerarray.array, seq)
+        return IndexSequence(seq, shape, data)
+
+
+class Hilbert(BaseSequencer):
+    """Sequencer following a Hilbert space filling curve.
+
+    Weights argument will be ignored.
+    """
+
+    name = "Hilbert"
+
+    @staticmethod
+    def flatten(startnode, integerarray, weights=None):
+        _ = weights
+        startnode, integerarray = _check_input(startnode, integerarray)
+        shape = integerarray.shape
+        seq = _traverse('Hilbert', curves.HilbertOrder, shape, int(startnode)-1)
+        data = np.take(integerarray.array, seq)
+        return IndexSequence(seq, shape, data)
 
 
 if __name__ == '__main__':
@@ -173,6 +237,8 @@ if __name__ == '__main__':
     print(BlossomC.name, BlossomC.flatten(startidx, iarr).sequence)
     print(BlockC.name, BlockC.flatten(startidx, iarr).sequence)
     print(Linear.name, Linear.flatten(startidx, iarr).sequence)
+    print(Morton.name, Morton.flatten(startidx, iarr).sequence)
+    print(Hilbert.name, Hilbert.flatten(startidx, iarr).sequence)
     print(Blossom.name, Blossom.flatten(startidx, iarr).sequence)
     print(Block.name, Block.flatten(startidx, iarr).sequence)
     print(Chequerboard.name, Chequerboard.flatten(startidx, iarr).sequence)
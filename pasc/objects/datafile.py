@@ -3,9 +3,11 @@
 """Classes of Datafiles Arrays."""
 
 import os
+import numpy as np
 import xarray as xr
 from pasc.backend import BaseData
 from pasc.objects.floatarray import FloatArray
+from pasc.toolbox.reader import Reader
 
 
 class Datafile(BaseData):
@@ -31,6 +33,16 @@ class Datafile(BaseData):
         dataarray = getattr(self.data, var)
         return FloatArray(dataarray.values)
 
+    def to_integerchunks(self, var, mapper, chunks=None, dtype=np.float32):
+        """Map variable `var` chunk by chunk to IntegerArrays.
+
+        See `Reader.chunks_from_dataarray`. All yielded IntegerArrays share
+        one buffer, which is overwritten when the next chunk is requested.
+        Copy an IntegerArray to keep it beyond the next iteration.
+        """
+        return Reader.chunks_from_dataset(self.data, var, mapper, chunks,
+                                          dtype)
+
     @staticmethod
     def from_netcdf(filename):
         return Datafile(xr.open_dataset(filename))
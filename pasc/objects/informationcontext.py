@@ -5,7 +5,7 @@
 import logging
 from collections import namedtuple
 from pasc.backend import BaseInformationContext
-from pasc.toolbox.flood import getNAN
+from pasc.toolbox.flood import getNAN, INTERNED
 import numpy as np
 _log = logging.getLogger(__name__)
 
@@ -49,7 +49,12 @@ class InformationContext(BaseInformationContext):
     context = property(_get_context, _set_context)
 
     @staticmethod
-    def create(data, **kwargs):
+    def create(data, owned=False, **kwargs):
+        """Context of `data` with info `kwargs`.
+
+        `data` is interned, i.e. copied unless it is `owned` by the caller
+        (a fresh array not used elsewhere), which is set read-only instead.
+        """
         _log.debug("XX %s %s", data, kwargs)
         if kwargs.get('id', False):
             try:
@@ -58,7 +63,7 @@ class InformationContext(BaseInformationContext):
                 # If 'id' is not a tuple, just take it as is
                 _log.warning("Info is not tuple, taking as is: %s %s",
                              data, kwargs)
-        data.flags.writeable = False
+        data = INTERNED.intern(data, owned=owned).array
         return CTX(data, kwargs)
 
 
@@ -2,6 +2,8 @@
 # coding: utf-8
 """Types of Information Space."""
 
+import os
+import numpy as np
 from pasc.backend import BaseInformationSpace, BaseInformationContext as bIC
 from pasc.objects.informationcontext import InformationContext as IC
 
@@ -34,3 +36,136 @@ class InformationSpace(BaseInformationSpace):
 
     def __repr__(self):
         return str({k:v for k,v in sorted(self.space.items())})
+
+
+class LazyInformationSpace(InformationSpace):
+    """InformationSpace computing the contexts of a dimension on first access.
+
+    Arguments
+    =========
+    dims : iterable(int)
+        Dimensions present in the InformationSpace.
+    method : callable
+        `method(dim)` returns the contexts of dimension `dim`.
+    """
+
+    name = "LazyInformationSpace"
+
+    def __init__(self, dims, method):
+        self.dims = tuple(dims)
+        self.method = method
+        self._space = dict()
+
+    def __getitem__(self, dim):
+        context = self._space.get(dim)
+        if context is None:
+            if dim not in self.dims:
+                raise KeyError(dim)
+            context = self.method(dim)
+            if not isinstance(context, bIC):
+                context = IC(context)
+            self._space[dim] = context
+        return context
+
+    def _get_space(self):
+        return {dim: self[dim] for dim in self.dims}
+
+    def _set_space(self, value):
+        InformationSpace._set_space(self, value)
+        self.dims = tuple(self._space)
+    space = property(_get_space, _set_space)
+
+
+class PackedInformationSpaces:
+    """Information spaces of consecutive sequence steps in packed buffers.
+
+    All contexts are stored back to back in a single value buffer (CSR
+    style). Contexts of step `t` are `stepptr[t]:stepptr[t + 1]`, grouped
+    by dimension. The values of context `c` are
+    `values[offsets[c]:offsets[c + 1]]` with the INTNAN value at flat
+    position `nanpos[c]`. The buffers can be saved to a folder of `.npy`
+    files and loaded memory mapped.
+
+    Attributes
+    ==========
+    values : np.ndarray
+        Values of all contexts.
+    offsets : np.ndarray
+        Start of each context in `values` (contexts + 1).
+    nanpos : np.ndarray
+        Flat position of the INTNAN value in each context.
+    axes : np.ndarray
+        Axis of each 1D context (-1 for contexts without axis).
+    stepptr : np.ndarray
+        Start of the contexts of each step (steps + 1).
+    shapes : np.ndarray
+        Shape of each context padded with zeros (contexts x ndim). All
+        contexts are 1D if not given.
+    dims : tuple(int)
+        Dimensions present in each InformationSpace.
+    """
+
+    buffers = ('values', 'offsets', 'nanpos', 'axes', 'stepptr', 'shapes')
+
+    def __init__(self, values, offsets, nanpos, axes, stepptr, shapes=None,
+                 dims=(1,)):
+        self.values = values
+        self.offsets = offsets
+        self.nanpos = nanpos
+        self.axes = axes
+        self.stepptr = stepptr
+        self.shapes = shapes
+        self.dims = tuple(int(x) for x in dims)
+
+    def __len__(self):
+        return self.stepptr.size - 1
+
+    def __iter__(self):
+        return (self.space(t) for t in range(len(self)))
+
+    def context(self, c):
+        """Values of context `c`."""
+        data = self.values[self.offsets[c]:self.offsets[c + 1]]
+        if self.shapes is None:
+            return data
+        shape = self.shapes[c]
+        return data.reshape(tuple(shape[shape > 0]))
+
+    def space(self, t):
+        """InformationSpace of step `t`."""
+        result = {dim: list() for dim in self.dims}
+        for c in range(self.stepptr[t], self.stepptr[t + 1]):
+            data = self.context(c)
+            if self.axes[c] < 0:
+                result[data.ndim].append(IC.create(data=data))
+            else:
+                result[data.ndim].append(IC.create(
+                    data=data, id=(int(self.axes[c]),), size=data.size))
+        return InformationSpace({k: IC(v) for k, v in result.items()})
+
+    def save(self, directory):
+        """Write all buffers as `.npy` files into `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        arrays = {k: getattr(self, k) for k in self.buffers}
+        arrays['dims'] = np.array(self.dims, dtype=np.int64)
+        for name, array in arrays.items():
+            if array is None:
+                continue
+            filename = os.path.join(directory, '{}.npy'.format(name))
+            tmpfile = '{}.{}.tmp'.format(filename, os.getpid())
+            with open(tmpfile, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmpfile, filename)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load buffers written by `save` (memory mapped by default)."""
+        arrays = dict()
+        for name in cls.buffers + ('dims',):
+            filename = os.path.join(directory, '{}.npy'.format(name))
+            if name == 'shapes' and not os.path.exists(filename):
+                arrays[name] = None
+                continue
+            arrays[name] = np.load(filename, mmap_mode=mmap_mode)
+        arrays['dims'] = tuple(arrays['dims'].tolist())
+        return cls(**arrays)
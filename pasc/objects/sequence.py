@@ -69,10 +69,63 @@ class IndexSequence(Sequence):
     def _get_sequence(self):
         return self._sequence
     def _set_sequence(self, value):
-        value = np.array(value)
+        value = np.asarray(value)  # Cached orders are shared, not copied
         if not (isinstance(value, np.ndarray) and value.ndim == 1 and
                 value.dtype in (int, np.int32, np.int64)):
             err_msg = "Not a numpy array with one dimension and dtype=int."
             raise TypeError(err_msg)
         self._sequence = value
+        self._inverse = None
     sequence = property(_get_sequence, _set_sequence)
+
+    @property
+    def inverse(self):
+        """Position in the sequence of each (flat) index of the grid.
+
+        Indices not part of the sequence are marked with -1.
+        """
+        if self._inverse is None:
+            size = int(np.prod(self.shape))
+            inverse = np.full(size, -1, dtype=self.sequence.dtype)
+            inverse[self.sequence] = np.arange(self.sequence.size)
+            inverse.flags.writeable = False
+            self._inverse = inverse
+        return self._inverse
+
+    def unflatten(self, values, offset=0, out=None):
+        """Scatter values in sequence order into an array in grid order.
+
+        Arguments
+        =========
+        values : np.ndarray
+            Values of the sequence starting at position `offset`.
+        offset : int
+            Position in the sequence of the first value (for chunks).
+        out : np.ndarray
+            Array of `shape` to scatter into. Otherwise a new array, which
+            is gathered through `inverse` if the sequence covers the whole
+            grid (zero for cells not in the sequence).
+
+        Returns
+        =======
+        result : np.ndarray
+            Array of `shape` with values at their grid positions.
+        """
+        values = np.asarray(values).reshape(-1)
+        idx = self.sequence[offset:offset + values.size]
+        if idx.size != values.size:
+            err = "Sequence has {} elements after {}, got {}.".format(
+                idx.size, offset, values.size)
+            raise ValueError(err)
+        if out is None:
+            size = int(np.prod(self.shape))
+            if offset == 0 and values.size == size:
+                return values[self.inverse].reshape(self.shape)
+            out = np.zeros(self.shape, dtype=values.dtype)
+        out.flat[idx] = values
+        return out
+
+    def gather(self, array, offset=0, count=None):
+        """Values of array in grid order for a chunk of the sequence."""
+        stop = None if count is None else offset + count
+        return np.take(array, self.sequence[offset:stop])
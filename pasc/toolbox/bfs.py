@@ -53,35 +53,131 @@ def neighbours_at(distance, neighbours, weights, default=1):
     return result
 
 
-@lru_cache(128)
-def BFSms(shape, startidx, distance, weights, default=1, marked=None):
+def BFSms(shape, startidx, distance, weights, default=1):
     """A faster implementation of BFS method using properties of the cube.
+
+    Visited cells are tracked in a boolean bitmap. The search queue is a
+    preallocated ring buffer of one entry per cell which drops its oldest
+    entry when full. Neighbours are enqueued in the order of their weights
+    and checked against the bitmap when dequeued. Disconnected components
+    are restarted iteratively at the next unvisited index.
+
+    Returns
+    =======
+    startidx : int
+        Index the traversal started at.
+    order : np.ndarray
+        Indices in the order of traversal.
     """
     if isinstance(distance, Number):
         distance = (distance,)
-    maxsize = int(np.prod(shape))
-    search = deque(maxlen=maxsize)
-    if marked is None:
-        marked = deque(maxlen=maxsize)
-    else:
-        marked = deque(marked, maxlen=maxsize)
-
-    search.append(startidx)
-    while search:
-        element = search.popleft()
-        if element in marked:
-            continue
-        neighbours = neighbour_idx(
-            idx=element, distance=distance, shape=shape, weights=weights, default=default)
-        for k in neighbours:
-            search.append(k)
-        marked.append(element)
-    while len(marked) != maxsize:
-        idx = startidx
-        while idx in marked:
-            idx += 1
-        _, marked = BFSms(shape, idx, distance, weights, default, tuple(marked))
-    return startidx, marked
+    table = NeighbourTable(shape, tuple(distance), weights, default)
+    indptr, indices = memoryview(table.indptr), memoryview(table.indices)
+    maxsize = table.size
+    result = np.empty(maxsize, dtype=np.int64)
+    visited = memoryview(np.zeros(maxsize, dtype=bool))
+    order = memoryview(result)
+    search = memoryview(np.empty(maxsize, dtype=np.int64))
+    marked, restart = 0, startidx
+
+    while marked < maxsize:
+        while visited[restart]:
+            restart = (restart + 1) % maxsize
+        search[0], head, size = restart, 0, 1
+        while size:
+            element = search[head]
+            head, size = (head + 1) % maxsize, size - 1
+            if visited[element]:
+                continue
+            for neighbour in indices[indptr[element]:indptr[element + 1]]:
+                search[(head + size) % maxsize] = neighbour
+                if size == maxsize:
+                    head = (head + 1) % maxsize
+                else:
+                    size += 1
+            visited[element] = True
+            order[marked] = element
+            marked += 1
+    return startidx, result
+
+
+class NeighbourTable:
+    """Adjacent cells of all cells of an array as CSR structure.
+
+    The table is built for a given shape and distance pattern at once using
+    precomputed flat index offsets and boundary masks. The neighbours of
+    cell `i` are `indices[indptr[i]:indptr[i + 1]]` ordered by weight.
+
+    Attributes
+    ==========
+    indptr : np.ndarray
+        Start of the neighbours of each cell in `indices` (size + 1).
+    indices : np.ndarray
+        Flat indices of all neighbours.
+    data : np.ndarray
+        Weight of each neighbour in `indices` (only set if `data=True`).
+    """
+
+    def __init__(self, shape, distance, weights=(), default=1, data=False):
+        if isinstance(distance, Number):
+            distance = (distance,)
+        self.shape = tuple(shape)
+        self.size = int(np.prod(shape))
+        offsets = weighted_offsets(self.shape, tuple(distance), weights, default)
+        dtype = np.int32 if self.size <= np.iinfo(np.int32).max else np.int64
+        cells = np.arange(self.size, dtype=dtype)
+        coords = np.unravel_index(cells, self.shape)
+        valid = np.ones((self.size, len(offsets)), dtype=bool)
+        for j, (_, bounds, _) in enumerate(offsets):
+            for d, k, n in bounds:
+                coord = coords[d] + k
+                valid[:, j] &= (coord >= 0) & (coord < n)
+        steps = np.array([x for x, _, _ in offsets], dtype=dtype)
+        self.indices = (cells[:, np.newaxis] + steps)[valid]
+        self.data = None
+        if data:
+            weight = np.array([x for _, _, x in offsets])
+            self.data = np.broadcast_to(weight, valid.shape)[valid]
+        self.indptr = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(valid.sum(axis=1), out=self.indptr[1:])
+        self._indptr = memoryview(self.indptr)
+        self._indices = memoryview(self.indices)
+
+    def __getitem__(self, idx):
+        return self._indices[self._indptr[idx]:self._indptr[idx + 1]]
+
+    def __len__(self):
+        return self.size
+
+
+@lru_cache(128)
+def weighted_offsets(shape, distance, weights, default=1):
+    """Flat offsets of adjacent cells at certain distance sorted by weight.
+
+    Returns
+    =======
+    result : tuple((int, tuple((int, int, int)), int))
+        Flat index offset, the (dimension, step, dimension size) triples
+        needed for checking the array borders and the weight of each
+        neighbour.
+    """
+    dims = len(shape)
+    neighbours = tuple(all_neighbours(dims))
+    strides = _strides(shape)
+    result = list()
+    for k, w in neighbours_at(distance, neighbours, weights, default):
+        step = sum(x * y for x, y in zip(k, strides))
+        bounds = tuple((d, x, shape[d]) for d, x in enumerate(k) if x != 0)
+        result.append((step, bounds, w))
+    return tuple(result)
+
+
+def _strides(shape):
+    """Strides (in elements) of a C ordered array of given shape."""
+    strides = [1] * len(shape)
+    for i in range(len(shape) - 2, -1, -1):
+        strides[i] = strides[i + 1] * shape[i + 1]
+    return tuple(strides)
 
 
 BFSCheq = partial(BFSms, distance=2,)
@@ -94,6 +190,9 @@ BFSBloc = partial(BFSms, distance=(1, 2, 3))
 
 class BFSSetup:
     """Set up of BFS algorithm using distance and shape.
+
+    Neighbours are looked up in a precomputed NeighbourTable and returned
+    in the same form (and order) as by `neighbour_idx`.
     """
 
     def __init__(self, shape, distance):
@@ -101,11 +200,11 @@ class BFSSetup:
         self.shape = shape
         self.default = 1
         self.weights = ()
+        self.table = NeighbourTable(shape=shape, distance=distance,
+                                    weights=self.weights, default=self.default)
 
     def __getitem__(self, name):
-        return neighbour_idx(idx=name, distance=self.distance,
-                             shape=self.shape, weights=self.weights,
-                             default=self.default)
+        return dict.fromkeys(self.table[name], self.default)
 _CheqSetup = partial(BFSSetup, distance=(2,))
 _BlosSetup = partial(BFSSetup, distance=(1,))
 _BlocSetup = partial(BFSSetup, distance=(1, 2, 3,))
@@ -124,8 +223,9 @@ def classicBFS(g, start):
 
 def CheqNoWeights(shape, startidx):
     """Chequerboard BFS without weights."""
-    gen1 = classicBFS(_CheqSetup(shape), startidx)
-    gen2 = classicBFS(_CheqSetup(shape), startidx+1)
+    setup = _CheqSetup(shape)
+    gen1 = classicBFS(setup, startidx)
+    gen2 = classicBFS(setup, startidx+1)
     return chain(gen1, gen2)
 
 def BlosNoWeights(shape, startidx):
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Cache for traversal orders of sequencers and their information spaces.
+
+Orders only depend on the sequencer, the shape of the array, the start index
+and the weights. They are stored as compact integer arrays in a size bounded
+LRU cache and (optionally) as memory mapped `.npy` files on disk.
+
+Information spaces only depend on the sequence and the builder (and its
+restriction), not on the predictor or manager consuming them. They are
+stored as PackedInformationSpaces in the same way, one folder per key.
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+from collections import OrderedDict
+import numpy as np
+from pasc.objects.informationspace import PackedInformationSpaces
+_log = logging.getLogger(__name__)
+
+
+class OrderCache:
+    """Size bounded LRU cache of traversal orders with optional disk store.
+
+    Arguments
+    =========
+    maxbytes : int
+        Upper limit of bytes held in memory.
+    directory : str
+        Folder for `.npy` files. No files are written if not set.
+    """
+
+    def __init__(self, maxbytes=2**28, directory=None):
+        self.maxbytes = maxbytes
+        self.directory = directory
+        self.nbytes = 0
+        self._orders = OrderedDict()
+
+    def get(self, key, method):
+        """Traversal order for `key`, computed by `method()` if unknown."""
+        order = self._orders.get(key)
+        if order is not None:
+            self._orders.move_to_end(key)
+            return order
+        order = self._load(key)
+        if order is None:
+            order = compact(method())
+            order.flags.writeable = False
+            self._dump(key, order)
+        self._add(key, order)
+        return order
+
+    def clear(self):
+        """Empty in-memory cache. Files on disk are kept."""
+        self._orders.clear()
+        self.nbytes = 0
+
+    def filename(self, key):
+        """Path of the `.npy` file for `key`."""
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, '{}.npy'.format(digest))
+
+    def _add(self, key, order):
+        if order.nbytes > self.maxbytes:
+            return
+        self._orders[key] = order
+        self.nbytes += order.nbytes
+        while self.nbytes > self.maxbytes:
+            _, old = self._orders.popitem(last=False)
+            self.nbytes -= old.nbytes
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        try:
+            order = np.load(self.filename(key), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        _log.debug("Loaded order %s from disk", key)
+        return order
+
+    def _dump(self, key, order):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        filename = self.filename(key)
+        tmpfile = '{}.{}.tmp'.format(filename, os.getpid())
+        with open(tmpfile, 'wb') as f:
+            np.save(f, order)
+        os.replace(tmpfile, filename)
+
+    def __contains__(self, key):
+        return key in self._orders
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __repr__(self):
+        return "OrderCache({} orders, {} bytes, {})".format(
+            len(self), self.nbytes, self.directory)
+
+
+def compact(order):
+    """Order as smallest integer array able to address all its indices."""
+    order = np.asarray(order)
+    if order.size and order.max() > np.iinfo(np.int32).max:
+        return order.astype(np.int64, copy=False)
+    return order.astype(np.int32, copy=False)
+
+
+class SpaceStore(OrderCache):
+    """Size bounded LRU store of packed information spaces.
+
+    Works as `OrderCache`, but each entry is a PackedInformationSpaces
+    object written as a folder of `.npy` files.
+
+    Arguments
+    =========
+    maxbytes : int
+        Upper limit of bytes held in memory.
+    directory : str
+        Folder for the stored spaces. Nothing is written if not set.
+    """
+
+    def get(self, key, method):
+        """Packed information spaces for `key`, built by `method()` if unknown."""
+        spaces = self._orders.get(key)
+        if spaces is not None:
+            self._orders.move_to_end(key)
+            return spaces
+        spaces = self._load(key)
+        if spaces is None:
+            spaces = method()
+            self._dump(key, spaces)
+        self._add(key, spaces)
+        return spaces
+
+    def filename(self, key):
+        """Path of the folder for `key`."""
+        return os.path.splitext(super().filename(key))[0]
+
+    def _add(self, key, spaces):
+        nbytes = _nbytes(spaces)
+        if nbytes > self.maxbytes:
+            return
+        self._orders[key] = spaces
+        self.nbytes += nbytes
+        while self.nbytes > self.maxbytes:
+            _, old = self._orders.popitem(last=False)
+            self.nbytes -= _nbytes(old)
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        try:
+            spaces = PackedInformationSpaces.load(self.filename(key))
+        except (OSError, ValueError):
+            return None
+        _log.debug("Loaded information spaces %s from disk", key)
+        return spaces
+
+    def _dump(self, key, spaces):
+        if not self.directory:
+            return
+        filename = self.filename(key)
+        tmpdir = '{}.{}.tmp'.format(filename, os.getpid())
+        spaces.save(tmpdir)
+        try:
+            os.rename(tmpdir, filename)
+        except OSError:  # Stored in the meantime by another process
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def __repr__(self):
+        return "SpaceStore({} entries, {} bytes, {})".format(
+            len(self), self.nbytes, self.directory)
+
+
+def spacekey(seq, builder, restriction=None, sequencer=None, startidx=None):
+    """Key of the information spaces of `seq` built by `builder`.
+
+    The data hash covers values, traversal order and shape of the sequence,
+    so sequences of equal data but unknown sequencer never collide.
+    """
+    digest = hashlib.sha1(repr((seq.shape, seq.dtype.str)).encode())
+    digest.update(np.ascontiguousarray(seq.sequence, dtype=np.int64))
+    digest.update(np.ascontiguousarray(seq.data))
+    sequencer = getattr(sequencer, 'name', sequencer)
+    builder = getattr(builder, '__name__', builder)
+    return (digest.hexdigest(), sequencer, startidx, builder, restriction)
+
+
+def _nbytes(spaces):
+    """Bytes of the in-memory buffers (memory mapped ones are not counted)."""
+    buffers = [getattr(spaces, x) for x in spaces.buffers]
+    return sum(x.nbytes for x in buffers
+               if x is not None and not isinstance(x, np.memmap))
+
+
+orders = OrderCache(directory=os.getenv('PASC_ORDERCACHE', None))
+spaces = SpaceStore(directory=os.getenv('PASC_SPACESTORE', None))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Space filling curves (Morton/Z-order and Hilbert) for N dimensions.
+
+Curve indices are computed for all cells at once via bit operations on the
+coordinate arrays. Arrays with a shape which is not a power of two are
+embedded into the smallest enclosing hypercube of side length 2**bits. Cells
+outside of the array are skipped.
+"""
+
+import numpy as np
+
+
+def curve_bits(shape):
+    """Bits per dimension needed to address the enclosing hypercube."""
+    bits = max(int(np.ceil(np.log2(max(max(shape), 2)))), 1)
+    if bits * len(shape) > 64:
+        err = "Curve index of shape {} exceeds 64 bits.".format(shape)
+        raise ValueError(err)
+    return bits
+
+
+def interleave(coords, bits):
+    """Interleave bits of coordinates (first dimension most significant).
+
+    Arguments
+    =========
+    coords : np.ndarray
+        Coordinates with shape (ndim, N).
+    bits : int
+        Number of bits per coordinate.
+
+    Returns
+    =======
+    result : np.ndarray
+        Interleaved index of dtype np.uint64 for each of the N cells.
+    """
+    ndim = coords.shape[0]
+    result = np.zeros(coords.shape[1], dtype=np.uint64)
+    one = np.uint64(1)
+    for b in range(bits):
+        for i in range(ndim):
+            bit = (coords[i] >> np.uint64(b)) & one
+            result |= bit << np.uint64(b * ndim + ndim - 1 - i)
+    return result
+
+
+def morton_index(coords, bits):
+    """Morton (Z-order) index of coordinates with shape (ndim, N)."""
+    return interleave(np.asarray(coords, dtype=np.uint64), bits)
+
+
+def hilbert_index(coords, bits):
+    """Hilbert index of coordinates with shape (ndim, N).
+
+    Note
+    ====
+    Vectorized version of `AxestoTranspose` from J. Skilling,
+    "Programming the Hilbert curve", AIP Conf. Proc. 707, 2004.
+    """
+    X = np.array(coords, dtype=np.uint64)
+    ndim = X.shape[0]
+    M = 1 << (bits - 1)
+
+    # Inverse undo excess work
+    Q = M
+    while Q > 1:
+        P = np.uint64(Q - 1)
+        for i in range(ndim):
+            mask = (X[i] & np.uint64(Q)) != 0
+            X[0] ^= np.where(mask, P, np.uint64(0))
+            t = (X[0] ^ X[i]) & P
+            t[mask] = 0
+            X[0] ^= t
+            X[i] ^= t
+        Q >>= 1
+
+    # Gray encode
+    for i in range(1, ndim):
+        X[i] ^= X[i - 1]
+    t = np.zeros(X.shape[1], dtype=np.uint64)
+    Q = M
+    while Q > 1:
+        mask = (X[ndim - 1] & np.uint64(Q)) != 0
+        t[mask] ^= np.uint64(Q - 1)
+        Q >>= 1
+    X ^= t
+    return interleave(X, bits)
+
+
+def _curve_order(index, shape, startidx):
+    """Order of cells sorted by curve index starting at `startidx`."""
+    size = int(np.prod(shape))
+    coords = np.unravel_index(np.arange(size), shape)
+    codes = index(np.array(coords), curve_bits(shape))
+    order = np.argsort(codes, kind='stable')
+    start = np.flatnonzero(order == startidx)[0]
+    return np.concatenate([order[start:], order[:start]])
+
+
+def MortonOrder(shape, startidx):
+    """Traversal order of a Morton (Z-order) curve."""
+    return _curve_order(morton_index, shape, startidx)
+
+
+def HilbertOrder(shape, startidx):
+    """Traversal order of a Hilbert curve."""
+    return _curve_order(hilbert_index, shape, startidx)
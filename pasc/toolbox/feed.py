@@ -7,13 +7,17 @@ the predictor from data consumption. Therefore the predictor only needs
 to be aware of the next value and update itself.
 """
 import logging
+from itertools import product
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from pasc.backend import BaseInformationSpace  # Input
 from pasc.backend import BaseSequence  # Input
+from pasc.objects.integerarray import IntegerArray  # Input
 from pasc.objects.predictionarray import PredictionArray  # Output
 # from pasc.objects.sequence import IndexSequence
 from pasc.modifier import builder as bd
 from pasc.toolbox import get_bits
-from pasc.toolbox.flood import getNAN
+from pasc.toolbox import cache
 import numpy as np
 _log = logging.getLogger(__name__)
 
@@ -69,24 +73,105 @@ class SeqFeeder(BaseFeeder):
         if not pa:
             result = np.array([self.step(x) for x in seqobj.data])
         else:
-            result = np.zeros_like(seqobj.data).reshape(seqobj.shape)
-            for i in range(len(seqobj.sequence)):
-                idx = seqobj[i]
-                true = seqobj.data[i]
-                prediction = self.step(true)
-                result.flat[idx] = prediction
-                _log.debug(
-                    "Idx: %s - Seq(%s): %s [Truth: %s]", idx, self.predictor, prediction, true)
-            result = PredictionArray(result)
+            predictions = [self.step(true) for true in seqobj.data]
+            predictions = np.array(predictions, dtype=seqobj.dtype)
+            result = PredictionArray(seqobj.unflatten(predictions))
         name = str(self.predictor)
         self.reset()
         return name, result
 
 
+class TileLayout(namedtuple('TileLayout', 'tiles, starts')):
+    """Tile boundaries and sequencer start index of each tile.
+
+    Needed to decode the stitched result of a `TileFeeder` tile by tile.
+    """
+
+    __slots__ = ()
+
+    def split(self, array):
+        """Yield slices, start index and data of each tile of `array`."""
+        for tile, start in zip(self.tiles, self.starts):
+            yield tile, start, array[tile]
+
+
+class TileFeeder(BaseFeeder):
+    """Feeder splitting an IntegerArray into independently predicted tiles.
+
+    Each tile is traversed by its own sequencer (starting at `startidx`
+    relative to the tile, clamped to the size of the tile) and predicted
+    by its own predictor. Tiles are processed in a process pool and
+    stitched into a single PredictionArray. Tile boundaries and the start
+    index used per tile are returned as TileLayout.
+    """
+
+    def __init__(self, predictor, sequencer, tileshape, *args, startidx=0,
+                 processes=None, **kwargs):
+        super().__init__(predictor, *args, **kwargs)
+        self.sequencer = sequencer
+        self.tileshape = tileshape
+        self.startidx = startidx
+        self.processes = processes
+
+    def feed(self, integerarray):
+        """Feed all tiles of IntegerArray to predictors.
+
+        Returns
+        =======
+        name : str
+            Name of the predictor.
+        result : PredictionArray
+            Stitched predictions of all tiles.
+        layout : TileLayout
+            Tiles and start index of each tile.
+        """
+        integerarray = _check_input(integerarray, IntegerArray)
+        array = integerarray.array
+        tiles = list(tileslices(array.shape, self.tileshape))
+        if not tiles or array.size == 0:
+            err = "No tiles of {} in array of shape {}".format(
+                self.tileshape, array.shape)
+            raise ValueError(err)
+        layout = TileLayout(tiles, [min(self.startidx, array[t].size - 1)
+                                    for t in tiles])
+        jobs = [(self.pred, self.sequencer, start, data, self.args,
+                 self.kwargs) for _, start, data in layout.split(array)]
+        if self.processes == 1:
+            results = [_feed_tile(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                results = list(pool.map(_feed_tile, *zip(*jobs)))
+        result = np.zeros_like(array)
+        for tile, (name, prediction) in zip(tiles, results):
+            result[tile] = prediction
+        return name, PredictionArray(result), layout
+
+
+def tileslices(shape, tileshape):
+    """Slices of all tiles of `tileshape` covering `shape` in C order."""
+    if len(shape) != len(tileshape):
+        err = "Tile shape {} does not match shape {}".format(tileshape, shape)
+        raise ValueError(err)
+    starts = product(*[range(0, n, t) for n, t in zip(shape, tileshape)])
+    for start in starts:
+        yield tuple(slice(x, min(x + t, n))
+                    for x, t, n in zip(start, tileshape, shape))
+
+
+def _feed_tile(predictor, sequencer, startidx, data, args, kwargs):
+    """Sequence and predict a single tile."""
+    tile = IntegerArray(np.ascontiguousarray(data))
+    seq = sequencer.flatten(startidx, tile)
+    feeder = SeqFeeder(predictor, *args, **kwargs)
+    name, prediction = feeder.feed(seq)
+    return name, prediction.array
+
+
 class SpaceFeederGen(BaseFeeder):
 
-    def __init__(self, builder, *args, **kwargs):
-        self.builder = bd.GeneralBuild
+    def __init__(self, builder, *args, lazy=False, **kwargs):
+        self.builder = bd.IncrementalBuild
+        self.lazy = lazy
         self.args = args
         self.kwargs = kwargs
     #
@@ -95,15 +180,12 @@ class SpaceFeederGen(BaseFeeder):
 
     def feed(self, seq, restriction):
         seq = _check_input(seq, BaseSequence)
-        nan = getNAN(seq.data.dtype)
         fillvalue = np.max(seq.data) + 1
-        arr = np.ones(shape=seq.shape, dtype=seq.dtype) * nan
-        # self.reset()
-        for i, searchidx in enumerate(seq.sequence):
-            truth = seq.data[i]
-            arr.flat[searchidx] = fillvalue
-            yield truth, self.builder.build_infospace(arr, searchval=fillvalue, restriction=restriction)
-            arr.flat[searchidx] = truth
+        builder = self.builder(seq.shape, seq.dtype, restriction=restriction)
+        for searchidx, truth in zip(seq.sequence, seq.data):
+            yield truth, builder.build_infospace(searchidx, searchval=fillvalue,
+                                                 lazy=self.lazy)
+            builder.reveal(searchidx, truth)
 
 
 class SpaceFeeder1DMA(BaseFeeder):
@@ -126,6 +208,54 @@ class SpaceFeeder1DMA(BaseFeeder):
             yield ma.data.flat[s], ispace
 
 
+class SpaceFeeder1DMask(BaseFeeder):
+    """`SpaceFeeder1DMA` without masked arrays (using `OneDBuildMask`)."""
+
+    def __init__(self, builder, *args, **kwargs):
+        self.builder = bd.OneDBuildMask
+        self.args = args
+        self.kwargs = kwargs
+
+    def feed(self, seq, restriction):
+        seq = _check_input(seq, BaseSequence)
+        builder = self.builder(seq.shape, seq.dtype, restriction=restriction)
+        for searchidx, truth in zip(seq.sequence, seq.data):
+            builder.reveal(searchidx, truth)
+            yield truth, builder.build_infospace(searchidx)
+
+
+class SpaceFeederStore(BaseFeeder):
+    """Feeder replaying information spaces from a SpaceStore.
+
+    The spaces of a sequence are built once by the batch `builder` (e.g.
+    `OneDBuildBatch` or `GeneralBuildBatch`) and kept in `store`, so every
+    further manager or predictor fed the same sequence only replays them.
+    `sequencer` and `startidx` only complete the store key. Unknown spaces
+    are built by `processes` worker processes on disjoint step ranges (all
+    cores if None).
+    """
+
+    def __init__(self, builder, *args, sequencer=None, startidx=None,
+                 store=None, processes=None, **kwargs):
+        self.builder = builder
+        self.sequencer = sequencer
+        self.startidx = startidx
+        self.store = store
+        self.processes = processes
+        self.args = args
+        self.kwargs = kwargs
+
+    def feed(self, seq, restriction):
+        seq = _check_input(seq, BaseSequence)
+        store = cache.spaces if self.store is None else self.store
+        key = cache.spacekey(seq, self.builder, restriction,
+                             self.sequencer, self.startidx)
+        packed = store.get(key, lambda: bd.build_parallel(
+            self.builder, seq, restriction, self.processes))
+        for truth, ispace in zip(seq.data, packed):
+            yield truth, ispace
+
+
 class _SpaceFeeder_old:
 
     def __init__(self, builder, *args, **kwargs):
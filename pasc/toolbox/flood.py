@@ -3,8 +3,9 @@
 """Algorithm for building of InfoSpace inspired by floodfill algorithms."""
 
 from functools import lru_cache
-from collections import deque  # , defaultdict
-from itertools import groupby, chain
+from bisect import bisect_right
+from collections import deque, defaultdict, OrderedDict
+from itertools import groupby
 import numpy as np
 
 
@@ -32,12 +33,6 @@ def hasNAN(arr):
     return np.any(arr == INTNAN)
 
 
-def getAllNANcoords(arr):
-    """All NaN values in IntegerArray."""
-    INTNAN = getNAN(arr.dtype)
-    return zip(*(arr == INTNAN).nonzero())
-
-
 def slicedice(tupl):
     """Generate slices along each element in tuple of corrosponding dimension."""
     size = len(tupl)
@@ -51,96 +46,237 @@ def slicedice(tupl):
     return slices
 
 
-def slicecut(arr, valcoord, tupl):
-    """Actualslicing of array.
-
-    Actual slicing of array at position tupl and continue with subarrays
-    containing val.
-    """
-    default = slice(None, None, None)
-    slicetuple = list()
-    for i, x in enumerate(tupl):
-        if not isinstance(x, NoneT):
-            if valcoord[i] == x:
-                return None
-            elif valcoord[i] > x:
-                slicetuple.append(slice(x + 1, None, None))
-            else:
-                slicetuple.append(slice(None, x, None))
-        else:
-            slicetuple.append(default)
-    result = arr.copy()
-    return result[slicetuple]
-
-
-def getBlocks(arr, val):
+def getBlocks(arr, val, restriction=None, origin=None):
     """Identify blocks of valid entries.
 
     Main algorithm applied to array for identifiying
-    neighbouring blocks containing val.
+    neighbouring blocks containing val. With a `restriction` only
+    blocks within this distance to val are considered.
+
+    Blocks are enumerated as bounding boxes within the fence of val. Each
+    box is split at the INTNAN values inside of it and every box is
+    expanded only once. Only boxes without INTNAN values are copied out of
+    the array.
     """
-    todo = deque()
+    if origin is None:
+        origin = tuple([x[0] for x in np.where(arr == val)])
+    origin = tuple(int(x) for x in origin)
+    box = _fence(val, arr, restriction=restriction, origin=origin)
+    lower = tuple(s.start for s in box)
+    upper = tuple(s.stop for s in box)
+    nans = np.argwhere(arr[box] == getNAN(arr.dtype)) + lower
+
+    todo = deque([(lower, upper)])
+    seen = set(todo)
     done = deque()
-    arr = fence(val, arr)
-    todo.append(arr)
-
     while todo:
-        arr = todo.pop()
-        if arr is None:
+        lower, upper = todo.pop()
+        inside = nans[np.all((nans >= lower) & (nans < upper), axis=1)]
+        if not inside.size:
+            done.append(arr[tuple(map(slice, lower, upper))].copy())
             continue
-        try:
-            valcoord = list(zip(*np.where(arr == val)))[0]
-        except IndexError:
-            continue
-        nanpos = list(getAllNANcoords(arr))
-        if nanpos:
-            slices = [slicedice(x) for x in nanpos]
-            # flat = [item for sublist in slices for item in sublist]
-            flat = list(chain.from_iterable(slices))
-            for sli in set(flat):
-                # choose best sli
-                obj = slicecut(arr, valcoord, sli)
-                if obj is not None:
-                    todo.append(obj)
-        elif not all([x is None for x in arr]):
-            # arr.flags.writeable = False
-            done.append(arr)
+        for dim, x in enumerate(origin):
+            for cut in np.unique(inside[:, dim]).tolist():
+                if cut == x:
+                    continue
+                sublower, subupper = list(lower), list(upper)
+                if x > cut:
+                    sublower[dim] = cut + 1
+                else:
+                    subupper[dim] = cut
+                sub = (tuple(sublower), tuple(subupper))
+                if sub not in seen:
+                    seen.add(sub)
+                    todo.append(sub)
     return done
 
 
-# TODO: Can be improved if a search limit is being used. No predictor will use a maximum k elements in a single direction. This can be restricted here.
-def fence(searchval, data):
+def fence(searchval, data, distances=None, restriction=None, origin=None):
     """Dramatically sink search space for adjacent blocks.
 
     Rooted at the searchval one traverses in each dimension
     until one arrives the dimension limits or a INTNAN value.
     These are the defining borders for the search space of
-    consecutive blocks.
+    consecutive blocks. The lower border includes the INTNAN value.
+
+    Arguments
+    =========
+    searchval : int
+        Value of the root cell.
+    data : np.ndarray
+        Array with INTNAN values for unknown cells.
+    distances : tuple(np.ndarray)
+        Precomputed `nanDistances` of data. Otherwise only the lines
+        through the root cell are scanned.
+    restriction : int
+        Maximum distance to the root cell in each direction. No cell
+        outside of this window is scanned.
+    origin : tuple(int)
+        Coordinates of the root cell if known beforehand.
     """
-    origin = tuple([x[0] for x in np.where(data == searchval)])
-    coords = list(origin)
-    INTNAN = getNAN(data.dtype)
-
-    corners = []
+    return data[_fence(searchval, data, distances, restriction, origin)]
+
+
+def _fence(searchval, data, distances=None, restriction=None, origin=None):
+    """Slices of `fence` in `data`."""
+    if origin is None:
+        origin = tuple([x[0] for x in np.where(data == searchval)])
+    origin = tuple(int(x) for x in origin)
+    if distances is not None:
+        before, after = distances
+        extent = [(x - before[(d,) + origin], x + after[(d,) + origin])
+                  for d, x in enumerate(origin)]
+    else:
+        extent = [_lineExtent(data, origin, d, restriction)
+                  for d in range(data.ndim)]
+    return fenceSlices(origin, extent, data.shape, restriction)
+
+
+def fenceSlices(origin, extent, shape, restriction=None):
+    """Slices of `fence` given the runs of known cells through `origin`.
+
+    Arguments
+    =========
+    origin : tuple(int)
+        Coordinates of the root cell.
+    extent : list(tuple(int))
+        First and last known cell of the run through `origin` along each
+        axis.
+    shape : tuple(int)
+        Shape of the array.
+    restriction : int
+        Maximum distance to `origin` in each direction.
+    """
+    result = list()
+    for x, n, (first, last) in zip(origin, shape, extent):
+        lower, upper = 0, n
+        if restriction is not None:
+            lower = max(0, x - restriction)
+            upper = min(n, x + restriction + 1)
+        result.append(slice(max(first - 1, lower), min(last + 1, upper)))
+    return tuple(result)
+
+
+def _lineExtent(data, origin, dim, restriction=None):
+    """First and last known cell of the run through `origin` along `dim`."""
+    x, n = origin[dim], data.shape[dim]
+    if restriction is not None:
+        lower, upper = max(0, x - restriction), min(n, x + restriction + 1)
+    else:
+        lower, upper = 0, n
+    line = data[origin[:dim] + (slice(lower, upper),) + origin[dim + 1:]]
+    return runExtent(line != getNAN(data.dtype), x, lower)
+
+
+def runExtent(known, x, lower=0):
+    """First and last cell of the run of known cells through `x`.
+
+    Arguments
+    =========
+    known : np.ndarray
+        Boolean mask of a line starting at position `lower`.
+    x : int
+        Position (in the coordinates of the full line) within the run.
+    lower : int
+        Position of the first element of `known`.
+    """
+    nans = np.flatnonzero(~known) + lower
+    below, above = nans[nans < x], nans[nans > x]
+    first = below[-1] + 1 if below.size else lower
+    last = above[0] - 1 if above.size else lower + known.size - 1
+    return first, last
+
+
+def nanDistances(data):
+    """Number of consecutive known cells before and after each cell.
+
+    Arguments
+    =========
+    data : np.ndarray
+        Array with INTNAN values for unknown cells.
+
+    Returns
+    =======
+    before, after : np.ndarray
+        Distances to the nearest INTNAN value (or border) minus one along
+        each axis, both of shape `(data.ndim,) + data.shape`.
+    """
+    known = data != getNAN(data.dtype)
+    before = np.empty((data.ndim,) + data.shape, dtype=np.int64)
+    after = np.empty_like(before)
     for dim in range(data.ndim):
-        pack = []
-        for direction in [-1, +1]:
-            current = data[origin]
-            coords = list(origin)
-            while current != INTNAN:
-                coords[dim] += direction
-                if any([x < 0 for x in coords]):
-                    coords[dim] -= direction
-                    break
-                try:
-                    current = data[tuple(coords)]
-                except IndexError:
-                    break
-            pack.append(coords[dim])
-        corners.append(pack)
-    newdata = data[[slice(x, y, None) if x < y else slice(
-        y, x, None) for x, y in corners]]
-    return newdata
+        before[dim] = _runsBefore(known, dim)
+        after[dim] = np.flip(_runsBefore(np.flip(known, dim), dim), dim)
+    return before, after
+
+
+def _runsBefore(known, axis):
+    """Number of consecutive known cells directly before each cell."""
+    shape = [1] * known.ndim
+    shape[axis] = known.shape[axis]
+    idx = np.arange(known.shape[axis]).reshape(shape)
+    lastnan = np.where(known, -1, idx)
+    np.maximum.accumulate(lastnan, axis=axis, out=lastnan)
+    lastnan = np.roll(lastnan, 1, axis=axis)
+    first = [slice(None)] * known.ndim
+    first[axis] = 0
+    lastnan[tuple(first)] = -1
+    return idx - 1 - lastnan
+
+
+class KnownRuns:
+    """Runs of known cells along each axis of an array.
+
+    Cells become known one at a time through `reveal`. The length of each
+    run of consecutive known cells is stored at both of its ends, so
+    revealing a cell merges the adjacent runs in O(ndim) and the run
+    around an unknown cell can be looked up in O(ndim).
+    """
+
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+        self.known = np.zeros(self.shape, dtype=bool)
+        self._length = np.zeros((len(self.shape),) + self.shape, dtype=np.int64)
+
+    @classmethod
+    def from_array(cls, data):
+        """Runs of the known (non INTNAN) cells of `data`."""
+        runs = cls(data.shape)
+        before, after = nanDistances(data)
+        runs.known = data != getNAN(data.dtype)
+        runs._length = before + after + 1
+        return runs
+
+    def _run(self, coord, dim, direction):
+        neighbour = list(coord)
+        neighbour[dim] += direction
+        if not 0 <= neighbour[dim] < self.shape[dim]:
+            return 0
+        neighbour = tuple(neighbour)
+        if not self.known[neighbour]:
+            return 0
+        return int(self._length[(dim,) + neighbour])
+
+    def extent(self, coord):
+        """First and last cell of the run through `coord` along each axis.
+
+        The cell at `coord` is treated as known, but must not be revealed.
+        """
+        return [(coord[d] - self._run(coord, d, -1),
+                 coord[d] + self._run(coord, d, +1))
+                for d in range(len(self.shape))]
+
+    def reveal(self, coord):
+        """Mark cell at `coord` as known."""
+        coord = tuple(coord)
+        if self.known[coord]:
+            return
+        for dim, (first, last) in enumerate(self.extent(coord)):
+            start, end = list(coord), list(coord)
+            start[dim], end[dim] = first, last
+            self._length[(dim,) + tuple(start)] = last - first + 1
+            self._length[(dim,) + tuple(end)] = last - first + 1
+        self.known[coord] = True
 
 
 def getUniqueBlocks(arr, val):
@@ -151,23 +287,102 @@ def getUniqueBlocks(arr, val):
 
 
 class _wrapper(object):
-    """Helper class to make np.ndarray hashable."""
+    """Helper class to make np.ndarray hashable.
+
+    Two wrappers are equal if dtype, shape and content of their arrays are
+    equal. The hash is computed once.
+    """
+
+    __slots__ = ('_array', '_key', '_hash')
 
     def __init__(self, array):
         self._array = array
-        self._hash = hash(array.data.tobytes())
+        self._key = (array.dtype.str, array.shape, array.tobytes())
+        self._hash = hash(self._key)
+
+    @property
+    def array(self):
+        return self._array
 
     def __hash__(self):
         return self._hash
 
     def __eq__(self, other):
-        # and np.array_equal(self._array, other._array)
-        return self._hash == other._hash
+        return self._hash == other._hash and self._key == other._key
+
+
+class Interner:
+    """Size bounded registry of shared read-only arrays.
+
+    Equal arrays (by dtype, shape and content) are mapped to a single
+    read-only instance wrapped together with its hash. Looking up an
+    interned instance again reuses this wrapper without hashing. At most
+    `maxbytes` (arrays and their keys) are held, the least recently used
+    arrays are dropped first. Larger arrays are not registered.
+    """
+
+    def __init__(self, maxbytes=2**26):
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._byvalue = OrderedDict()
+        self._byid = dict()
+
+    def __len__(self):
+        return len(self._byvalue)
+
+    def intern(self, array, owned=False):
+        """Wrapper of the shared read-only instance equal to `array`.
+
+        Writeable arrays and views are copied before they are registered.
+        With `owned` the caller hands `array` over, it is set read-only
+        instead of being copied.
+        """
+        wrapped = self.hashed(array)
+        known = self._byvalue.get(wrapped)
+        if known is not None:
+            self._byvalue.move_to_end(known)
+            return known
+        if owned:
+            array.flags.writeable = False
+        elif array.flags.writeable or array.base is not None:
+            array = array.copy()
+            array.flags.writeable = False
+        wrapped._array = array
+        if _nbytes(wrapped) > self.maxbytes:
+            return wrapped
+        self._byvalue[wrapped] = wrapped
+        self._byid[id(array)] = wrapped
+        self.nbytes += _nbytes(wrapped)
+        while self.nbytes > self.maxbytes:
+            dropped, _ = self._byvalue.popitem(last=False)
+            del self._byid[id(dropped.array)]
+            self.nbytes -= _nbytes(dropped)
+        return wrapped
+
+    def hashed(self, array):
+        """Hashable wrapper of `array`, reused if `array` is interned."""
+        known = self._byid.get(id(array))
+        if known is not None and known.array is array:
+            return known
+        return _wrapper(array)
+
+    def clear(self):
+        self._byvalue.clear()
+        self._byid.clear()
+        self.nbytes = 0
+
+
+def _nbytes(wrapped):
+    """Bytes held by an interned array and its key."""
+    return 2 * wrapped.array.nbytes
+
+
+INTERNED = Interner()
 
 
 def uniqueNDs(arrs):
     """Identify unique np.ndarrays from a list of values."""
-    return list(u._array for u in set([_wrapper(x) for x in arrs]))
+    return list(u.array for u in set([INTERNED.hashed(x) for x in arrs]))
 
 
 def uniqueNDsAndSuper(arrs):
@@ -245,17 +460,37 @@ def ndimDict(arrs, uniques=False, squeeze=False):
 
 
 def get_supers(arrs):
-    """Remove all subsets from a list of arrays."""
+    """Remove all subsets from a list of arrays.
+
+    An array is removed if all of its values are part of a later array
+    in the list sorted by size. Candidates are taken from an inverted
+    index of the values (using the rarest value of the array) and
+    checked by value bounds and their sorted unique values.
+    """
     sorted_li = sorted(arrs, key=lambda x: x.size)
+    values = [np.unique(x) for x in sorted_li]
+    index = defaultdict(list)
+    for i, uniq in enumerate(values):
+        for x in uniq.tolist():
+            index[x].append(i)
+
     supers = list()
-    while sorted_li:
-        arr = sorted_li.pop(0)
+    for i, (arr, uniq) in enumerate(zip(sorted_li, values)):
+        if not uniq.size:
+            if i == len(sorted_li) - 1:
+                supers.append(arr)
+            continue
+        candidates = min((index[x] for x in uniq.tolist()), key=len)
         include = True
-        for rest in sorted_li:
-            if all([x in rest for x in arr.flat]):
+        for j in candidates[bisect_right(candidates, i):]:
+            other = values[j]
+            if (other.size < uniq.size or other[0] > uniq[0] or
+                    other[-1] < uniq[-1]):
+                continue
+            pos = np.minimum(np.searchsorted(other, uniq), other.size - 1)
+            if np.array_equal(other[pos], uniq):
                 include = False
                 break
-            # print(arr, rest, all([x in rest.flat for x in arr.flat]))
         if include:
             supers.append(arr)
     return supers
@@ -2,7 +2,10 @@
 # coding: utf-8
 """Adjacent matrices and lists."""
 
-from pasc.toolbox.graphtheory.elements.cells import fromIdx, Cell
+from numbers import Number
+from pasc.toolbox.graphtheory.elements.cells import fromIndices, Cell
+from pasc.toolbox.bfs import NeighbourTable, pack_weights
+from scipy import sparse
 import numpy as np
 import pandas as pd
 
@@ -30,19 +33,14 @@ def generateAdjListAtDistance(distance, shape):
     if isinstance(distance, (list, tuple)):
         return generateAdjListAtDistanceLIST(distance, shape)
 
-    tmpdata = np.arange(np.prod(shape))
-    # nodenames = (tmpdata + 1).astype('<U3')
-    nodenames = np.array([str(x+1) for x in tmpdata]).reshape(shape)
-
-    adjList = dict()
-    for cellAtIdx in range(nodenames.size):
-        cell = fromIdx(idx=cellAtIdx, shape=shape,
-                       value=nodenames.flat[cellAtIdx])
-        neighbours = [x.index(shape)
-                      for x in cell.neighboursAtDistance(distance, shape)]
-        neighbours = [fromIdx(idx=int(x), shape=shape,
-                              value=nodenames.flat[int(x)]) for x in neighbours]
-        adjList[cell] = neighbours
+    size = int(np.prod(shape))
+    batch = fromIndices(np.arange(size), shape)
+    source, neighbours = batch.neighboursAtDistance(distance, shape)
+    cells = [Cell(coord, str(x + 1)) for x, coord in enumerate(batch.coords)]
+
+    adjList = {cell: [] for cell in cells}
+    for x, y in zip(source.tolist(), neighbours.index(shape).tolist()):
+        adjList[cells[x]].append(cells[y])
     return adjList
 
 
@@ -118,6 +116,81 @@ def wadjlist2adjmatrix(wadjlist, shape):
     return matrix
 
 
+def csrAdjMatrixAtDistance(distance, shape, weights=None, default=1):
+    """Generate sparse adjacent matrix from distance pattern.
+
+    Same neighbourhood as `generateAdjListAtDistance` (weighted like by
+    `addweights`), but built for all cells at once. Nodes are the flat
+    indices of the cells instead of names.
+
+    Arguments
+    =========
+    distance : int or list(int)
+        Distance(s) from source cells and neighbour cells to be considered.
+    shape : tuple(int)
+        Shape of original array.
+    weights : dict(tuple(int):int)
+        Weights for each direction given as relative coordinate.
+    default : int
+        Default weight if direction is not in weights.
+
+    Returns
+    =======
+    matrix : scipy.sparse.csr_matrix
+        Adjacent matrix of size prod(shape) x prod(shape).
+    """
+    if not default > 0:
+        raise BaseException('default <= 0')
+    if not isinstance(distance, Number):
+        distance = tuple(distance)
+    weights = pack_weights({tuple(getattr(k, 'direction', k)): v
+                            for k, v in (weights or {}).items()})
+    table = NeighbourTable(shape, distance, weights, default, data=True)
+    matrix = sparse.csr_matrix((table.data, table.indices, table.indptr),
+                               shape=(table.size, table.size))
+    matrix.sort_indices()
+    return matrix
+
+
+def wadjlist2csr(wadjlist, shape):
+    """Transform weighted adjacent list into sparse adjacent matrix.
+
+    Arguments
+    =========
+    wadjlist : dict(cell:dict(cell:int))
+        Weighted adjacent list.
+    shape : tuple(int)
+        Shape of original array.
+    Returns
+    =======
+    matrix : scipy.sparse.csr_matrix
+        Adjacent matrix with flat indices of the cells as nodes.
+    """
+    N = int(np.prod(shape))
+    rows, cols, data = [], [], []
+    for sourcecell, neighbours in wadjlist.items():
+        source = sourcecell.index(shape)
+        for neighbour, neighbourweight in neighbours.items():
+            rows.append(source)
+            cols.append(neighbour.index(shape))
+            data.append(neighbourweight)
+    matrix = sparse.coo_matrix((data, (rows, cols)), shape=(N, N))
+    return matrix.tocsr()
+
+
+def adjmatrix2csr(adjmatrix):
+    """Transform (named) adjacent matrix into sparse adjacent matrix.
+
+    Node `i` of the sparse matrix is the i-th column of `adjmatrix`.
+    """
+    return sparse.csr_matrix(np.asarray(adjmatrix))
+
+
+def csr2adjmatrix(matrix, mode='n'):
+    """Transform sparse adjacent matrix into named adjacent matrix."""
+    return nameAdjMatrix(matrix.toarray(), mode=mode)
+
+
 def emptyAdjMatrix(N, mode='n'):
     empty = np.zeros((N, N), dtype=int)
     return nameAdjMatrix(empty, mode=mode)
@@ -3,4 +3,4 @@
 """Elements of a graph."""
 
 from pasc.toolbox.graphtheory.elements._cells import BaseCell, BaseDirection
-from pasc.toolbox.graphtheory.elements.cells import Cell, Direction
+from pasc.toolbox.graphtheory.elements.cells import Cell, Direction, CellBatch
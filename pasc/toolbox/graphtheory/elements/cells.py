@@ -3,6 +3,7 @@
 """Cell + Direction representation of an element."""
 
 from itertools import product
+from functools import lru_cache
 from pasc.toolbox import check_methods
 from pasc.toolbox.graphtheory.elements import BaseCell, BaseDirection
 import numpy as np
@@ -213,5 +214,114 @@ def fromIdx(idx, shape, value):
         A Cell object with coordinates at given index position.
     """
     assert isinstance(idx, int)
-    coords = np.unravel_index(indices=idx, dims=shape)
+    coords = np.unravel_index(idx, shape)
     return Cell(coords, value)
+
+
+class CellBatch:
+    """Many Cells at once stored as struct of arrays.
+
+    Contrary to a list of Cell objects all operations (neighbours, indices,
+    validity) are done vectorized on all Cells of the batch.
+
+    Attributes
+    ==========
+    coords : np.ndarray
+        Coordinates of the Cells with shape (n, ndim).
+    vals : np.ndarray
+        Values of the Cells (or None).
+    """
+
+    def __init__(self, coords, vals=None):
+        self._coords = np.array(coords, dtype=np.int64, ndmin=2)
+        self._vals = None if vals is None else np.asarray(vals)
+
+    @property
+    def coords(self):
+        return self._coords
+
+    @property
+    def vals(self):
+        return self._vals
+
+    @property
+    def ndim(self):
+        return self._coords.shape[1]
+
+    def index(self, shape):
+        """Flat indices of all Cells. Raises ValueError if any is invalid."""
+        return np.ravel_multi_index(tuple(self._coords.T), shape)
+
+    def valid(self, shape):
+        """Mask of Cells lying inside an array of given shape."""
+        return ((self._coords >= 0) & (self._coords < shape)).all(axis=1)
+
+    def neighboursAtDistance(self, distance, shape):
+        """All neighbouring Cells with certain distance.
+
+        Same neighbours (and order) as `Cell.neighboursAtDistance` for each
+        Cell of the batch. Neighbours inherit the value of their source.
+
+        Arguments
+        =========
+        distance : int
+            Distance length.
+        shape : tuple(int)
+            Shape of the array to eliminate non-existing neighbours.
+
+        Returns
+        =======
+        source : np.ndarray
+            Position of the source Cell in the batch for each neighbour.
+        neighbours : CellBatch
+            Neighbouring Cells grouped by source Cell.
+        """
+        directions = relativeNeighbours(self.ndim)
+        directions = directions[np.abs(directions).sum(axis=1) == distance]
+        coords = self._coords[:, np.newaxis, :] + directions
+        valid = ((coords >= 0) & (coords < shape)).all(axis=2)
+        source = np.nonzero(valid)[0]
+        vals = None if self._vals is None else self._vals[source]
+        return source, CellBatch(coords[valid], vals)
+
+    def neighbourIndicesAtDistance(self, distance, shape):
+        """Flat indices of neighbours at certain distance as CSR structure.
+
+        Returns
+        =======
+        indptr : np.ndarray
+            Neighbours of Cell `i` are `indices[indptr[i]:indptr[i + 1]]`.
+        indices : np.ndarray
+            Flat indices of all neighbours.
+        """
+        source, neighbours = self.neighboursAtDistance(distance, shape)
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=len(self)), out=indptr[1:])
+        return indptr, neighbours.index(shape)
+
+    def __len__(self):
+        return self._coords.shape[0]
+
+    def __getitem__(self, i):
+        val = None if self._vals is None else self._vals[i]
+        return Cell(self._coords[i], val)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self):
+        return "CellBatch[{}x{}]".format(len(self), self.ndim)
+
+
+@lru_cache(maxsize=16)
+def relativeNeighbours(ndim):
+    """Directions to all neighbours in the order of `Cell.relneighbours`."""
+    result = np.array(list(product([-1, 1, 0], repeat=ndim)), dtype=np.int64)
+    result.flags.writeable = False
+    return result
+
+
+def fromIndices(indices, shape, values=None):
+    """Create a CellBatch from index positions (and shape)."""
+    coords = np.unravel_index(np.asarray(indices), shape)
+    return CellBatch(np.stack(coords, axis=-1), values)
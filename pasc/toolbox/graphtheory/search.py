@@ -2,111 +2,89 @@
 # coding: utf-8
 """Search algorithms for graphtheory."""
 
-import math
 import logging
 from collections import deque
+from itertools import chain
+from scipy import sparse
+import numpy as np
 import pandas as pd
-from pasc.toolbox import setupLog
 
-setupLog()
 LOG = logging.getLogger(__name__)
 
 
 def sorted_child_nodes(adjmatrix, node, lowest_first=False):
-    """Sort all child notes accordingly of adjacent matrix."""
+    """Sort all child notes accordingly of adjacent matrix.
+
+    Nodes of equal weight are sorted in the same direction as the weights.
+    """
+    if sparse.issparse(adjmatrix):
+        return sparse_child_nodes(adjmatrix, node, lowest_first)
     row = adjmatrix[node][adjmatrix[node] > 0]
-    result = row.sort_values(ascending=lowest_first).index
-    return result
+    result = row.sort_values(kind='mergesort').index
+    return result if lowest_first else result[::-1]
 
 
-def drop(adjmatrix, node):
-    tmp = adjmatrix.drop(node, 0)
-    dropped = tmp.drop(node, 1)
-    return dropped
+def sparse_child_nodes(adjmatrix, node, lowest_first=False):
+    """Sort all child nodes of a sparse (CSC) adjacent matrix."""
+    start, stop = adjmatrix.indptr[node], adjmatrix.indptr[node + 1]
+    nodes = adjmatrix.indices[start:stop]
+    weights = adjmatrix.data[start:stop]
+    positive = weights > 0
+    nodes, weights = nodes[positive], weights[positive]
+    result = nodes[np.lexsort((nodes, weights))]
+    return (result if lowest_first else result[::-1]).tolist()
 
 
-def dropAll(adjmatrix, exceptionlist=None):
-    if not exceptionlist:
-        exceptionlist = []
-    tobedropped = [x for x in adjmatrix.columns if x not in exceptionlist]
-    while tobedropped:
-        node = tobedropped.pop()
-        adjmatrix = drop(adjmatrix, node)
+def tosparse(adjmatrix):
+    """Sparse adjacent matrix in CSC format with sorted indices."""
+    adjmatrix = sparse.csc_matrix(adjmatrix)
+    adjmatrix.sort_indices()
     return adjmatrix
 
 
 def BFSlist(adjlist, startnode):
-    """Breadth First Search based on adjacent list."""
-    search = deque([startnode], maxlen=len(adjlist))
-    marked = deque([], maxlen=len(adjlist))
-
-    while search:
-        element = search.popleft()
-        if element in marked:
-            continue
-        children = sorted(adjlist[element])
-        for child in children:
-            if child not in search:
-                search.append(child)
-        marked.append(element)
-    if len(marked) != len(adjlist):
-        marked = check_missing_elements_list(
-            adjlist, marked, BFSlist, startnode)
-    return startnode, marked
-
-
-def check_missing_elements_list(adjlist, marked, method, oldstart=None):
-    """Check missing elements in adjacent list."""
-    for node in marked:
-        for k in [k for k, v in adjlist.items() if node in v]:
-            del adjlist[k][node]
-        del adjlist[node]
-
-    _, add = method(adjlist, list(adjlist)[0])
-    marked.extend(add)
-    return marked
+    """Breadth First Search based on adjacent list.
+
+    Children are visited in sorted order. Remaining components are
+    started at their first node in order of `adjlist`.
+    """
+    nodes = list(adjlist)
+    ids = {node: i for i, node in enumerate(nodes)}
+    children = [sorted(adjlist[node]) for node in nodes]
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum([len(x) for x in children], out=indptr[1:])
+    indices = np.array([ids[x] for x in chain.from_iterable(children)],
+                       dtype=np.int64)
+    order, _ = traverse(indptr, indices, ids[startnode], nearest=False)
+    return startnode, deque([nodes[x] for x in order.tolist()])
 
 
 def BFSmatrix(adjmatrix, startnode):
     """Breadth First Search based on adjacent matrix."""
+    return _search(adjmatrix, startnode, depthfirst=False)
+
+
+def DFS(adjmatrix, startnode):
+    """Depth First Search based on adjacent matrix."""
+    return _search(adjmatrix, startnode, depthfirst=True)
+
+
+def components(adjmatrix, startnode):
+    """Connected components in the order they are visited by BFS.
+
+    Returns
+    =======
+    labels : np.ndarray
+        Component label of each node (position in `adjmatrix`).
+    """
     assert check_adjacent_matrix(adjmatrix)
-    size = adjmatrix.index.size
-    LOG.info("Logging matrix %s", adjmatrix)
-    search = deque([startnode], maxlen=size)
-    marked = deque([], maxlen=size)
-
-    while search:
-        element = search.popleft()
-        if element in marked:
-            continue
-        children = sorted_child_nodes(adjmatrix, element)
-        LOG.info("Children of %s are %s", element, children)
-        for child in children:
-            if child not in search:
-                search.append(child)
-        marked.append(element)
-
-    marked = check_missing_elements_matrix(
-        adjmatrix=adjmatrix, marked=marked, method=BFSmatrix, oldstart=startnode)
-    return startnode, marked
-
-
-def check_missing_elements_matrix(adjmatrix, marked, method, oldstart):
-    """Check missing elements in adjacent matrix."""
-    size = adjmatrix.columns.size
-
-    # if adjmatrix was not fully connected
-    if len(marked) != size:
-        missingelements = [x for x in adjmatrix.columns if x not in marked]
-        subAdjMatrix = dropAll(adjmatrix, missingelements)
-        new_startnode = find_nearest(subAdjMatrix, oldstart)
-        _, add = method(subAdjMatrix, new_startnode)
-        marked.extend(add)
-    return marked
+    indptr, indices = children_table(adjmatrix)
+    _, labels = traverse(indptr, indices, _node_id(adjmatrix, startnode))
+    return labels
 
 
 def check_adjacent_matrix(adjmatrix):
-    assert isinstance(adjmatrix, pd.DataFrame)
+    assert isinstance(adjmatrix, pd.DataFrame) or sparse.issparse(adjmatrix)
     # N = adjmatrix.columns.size
     assert len(set(adjmatrix.shape)) == 1
     # assert all([adjmatrix.values[x, y] == adjmatrix.values[y, x]
@@ -114,36 +92,142 @@ def check_adjacent_matrix(adjmatrix):
     return True
 
 
-def DFS(adjmatrix, startnode):
-    """Depth First Search based on adjacent matrix."""
+def _search(adjmatrix, startnode, depthfirst):
     assert check_adjacent_matrix(adjmatrix)
-    size = adjmatrix.index.size
-    search = deque([startnode], maxlen=size)
-    marked = deque([], maxlen=size)
-
-    while search:
-        element = search.pop()
-        if element in marked:
-            continue
-        children = sorted_child_nodes(adjmatrix, element)
-        LOG.info("Children of %s are %s", element, children)
-        for child in children:
-            if child not in search:
-                search.append(child)
-        marked.append(element)
-
-    marked = check_missing_elements_matrix(
-        adjmatrix=adjmatrix, marked=marked, method=DFS, oldstart=startnode)
-    return startnode, marked
-
-
-def find_nearest(array, value):
-    array = array.columns.values.astype(int)
-    value = int(value)
-
-    idx = pd.np.searchsorted(array, value, side="left")
-    if idx > 0 and (idx == len(array) or math.fabs(value - array[idx - 1]) < math.fabs(value - array[idx])):
-        result = str(array[idx - 1])
-    else:
-        result = str(array[idx])
-    return result
+    LOG.info("Logging matrix %s", adjmatrix)
+    indptr, indices = children_table(adjmatrix)
+    order, _ = traverse(indptr, indices, _node_id(adjmatrix, startnode),
+                        depthfirst=depthfirst)
+    if isinstance(adjmatrix, pd.DataFrame):
+        return startnode, deque(adjmatrix.columns[order])
+    return startnode, deque(order.tolist())
+
+
+def _node_id(adjmatrix, node):
+    if isinstance(adjmatrix, pd.DataFrame):
+        return adjmatrix.columns.get_loc(node)
+    return int(node)
+
+
+def children_table(adjmatrix):
+    """Child nodes of all nodes of an adjacent matrix as CSR structure.
+
+    Children of node `i` are `indices[indptr[i]:indptr[i + 1]]` in the
+    order of `sorted_child_nodes`, i.e. highest weight (and node) first.
+    """
+    if isinstance(adjmatrix, pd.DataFrame):
+        adjmatrix = adjmatrix.values
+    adjmatrix = tosparse(adjmatrix)
+    positive = adjmatrix.data > 0
+    columns = np.repeat(np.arange(adjmatrix.shape[1]),
+                        np.diff(adjmatrix.indptr))[positive]
+    rows = adjmatrix.indices[positive].astype(np.int64)
+    weights = adjmatrix.data[positive].astype(float)
+    ordered = np.lexsort((-rows, -weights, columns))
+    indptr = np.zeros(adjmatrix.shape[1] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(columns, minlength=adjmatrix.shape[1]),
+              out=indptr[1:])
+    return indptr, rows[ordered]
+
+
+def traverse(indptr, indices, startnode, depthfirst=False, nearest=True):
+    """Traverse all nodes of a graph given as CSR structure.
+
+    Visited nodes and nodes waiting in the search queue (or stack) are
+    tracked in bitsets, so a child is only added if it is neither visited
+    nor already waiting. If not all nodes are reachable the search is
+    restarted at the unvisited node nearest to the last start (ties going
+    to the higher node) or, with `nearest=False`, at the lowest unvisited
+    node.
+
+    Arguments
+    =========
+    indptr, indices : np.ndarray
+        Children of node `i` are `indices[indptr[i]:indptr[i + 1]]`.
+    startnode : int
+        Node to start with.
+    depthfirst : bool
+        Use a stack instead of a queue.
+    nearest : bool
+        Restart policy for disconnected graphs.
+
+    Returns
+    =======
+    order : np.ndarray
+        Nodes in the order of traversal.
+    labels : np.ndarray
+        Connected component (numbered by order of traversal) of each node.
+    """
+    size = len(indptr) - 1
+    result = np.empty(size, dtype=np.int64)
+    labels = np.empty(size, dtype=np.int64)
+    indptr, indices = memoryview(indptr), memoryview(indices)
+    visited = memoryview(np.zeros(size, dtype=bool))
+    waiting = memoryview(np.zeros(size, dtype=bool))
+    search = memoryview(np.empty(size, dtype=np.int64))
+    order, label = memoryview(result), memoryview(labels)
+    unvisited = _Unvisited(size)
+    marked, component, start = 0, 0, startnode
+
+    while marked < size:
+        search[0], head, tail = start, 0, 1
+        waiting[start] = True
+        while head < tail:
+            if depthfirst:
+                tail -= 1
+                element = search[tail]
+            else:
+                element = search[head]
+                head += 1
+            waiting[element] = False
+            for child in indices[indptr[element]:indptr[element + 1]]:
+                if not (visited[child] or waiting[child]):
+                    waiting[child] = True
+                    search[tail] = child
+                    tail += 1
+            visited[element] = True
+            unvisited.remove(element)
+            order[marked], label[element] = element, component
+            marked += 1
+        component += 1
+        if marked < size:
+            start = unvisited.nearest(start) if nearest else unvisited.first()
+    return result, labels
+
+
+class _Unvisited:
+    """Sorted set of unvisited nodes with nearest neighbour lookup.
+
+    Removed nodes point to their next candidate to the left and right
+    (path compression), so all lookups of a traversal are near-linear.
+    """
+
+    def __init__(self, size):
+        self._left = np.arange(size + 2)
+        self._right = np.arange(size + 2)
+        self._size = size
+
+    def remove(self, node):
+        self._left[node + 1] = node
+        self._right[node + 1] = node + 2
+
+    @staticmethod
+    def _find(pointer, pos):
+        root = pos
+        while pointer[root] != root:
+            root = pointer[root]
+        while pointer[pos] != root:
+            pointer[pos], pos = root, pointer[pos]
+        return root
+
+    def first(self):
+        return int(self._find(self._right, 1)) - 1
+
+    def nearest(self, node):
+        left = int(self._find(self._left, node + 1)) - 1
+        right = int(self._find(self._right, node + 1)) - 1
+        if left < 0:
+            return right
+        if right >= self._size or node - left < right - node:
+            return left
+        return right
@@ -8,7 +8,7 @@ import logging
 from abc import abstractmethod, ABCMeta
 import numpy as np
 from pasc.objects.predictionarray import PredictionArray
-from pasc.toolbox.flood import _wrapper
+from pasc.toolbox.flood import INTERNED
 from pasc.modifier.predictor import core
 _log = logging.getLogger(__name__)
 
@@ -78,7 +78,7 @@ class BaseManager(metaclass=ABCMeta):
         predictor = self.searchforvpt(ctx)
         predictor.update(truth)
         arr = np.concatenate([ctx.data[1:-1], [truth]])
-        newkey = hash(_wrapper(arr))  # % self.vptpow
+        newkey = INTERNED.intern(arr)  # % self.vptpow
         _log.debug("Update(%s) - Obj: %s - Ctx: %s - NewCtx: %s|%s - Truth: %s",
                    predictor, self.obj, ctx.data[:-1], arr, newkey, truth)
         self.vpt[newkey] = predictor
@@ -90,7 +90,7 @@ class BaseManager(metaclass=ABCMeta):
         d = ctx.data
         predictor = self.pred(*self.args, **self.kwargs)
         while d.size > 0:
-            k = hash(_wrapper(d))
+            k = INTERNED.hashed(d)
             p = self.vpt.get(k, False)
             if p:
                 predictor = p
@@ -167,10 +167,8 @@ class Aggregate:
         if not pa:
             result = np.array(predictions)
         else:
-            result = np.zeros(seq.shape).astype(seq.dtype)
-            for i, v in enumerate(seq.sequence):
-                result.flat[v] = predictions[i]
-            result = PredictionArray(result)
+            predictions = np.array(predictions, dtype=seq.dtype)
+            result = PredictionArray(seq.unflatten(predictions))
         name = str(self.manager.predictor)
         self.manager.reset()
         return name, result
@@ -6,6 +6,7 @@ the ability to choose subsets of the source data.
 """
 
 import os
+from itertools import product
 import xarray as xr
 from pasc.objects import floatarray as fl
 import numpy as np
@@ -60,6 +61,68 @@ class Reader:
         return Reader.from_netcdf(path, var,  *args, **kwargs)#, size, seed, error, *args, **kwargs)
 
 
+    @staticmethod
+    def chunks_from_dataarray(dataarray, mapper, chunks=None, dtype=np.float32):
+        """Map DataArray chunk by chunk to IntegerArrays.
+
+        Only a single chunk of the variable is loaded into memory at a time.
+        Each chunk is mapped into the same integer buffer, i.e. the yielded
+        IntegerArray is only valid until the next chunk is requested.
+
+        Arguments
+        =========
+        dataarray : xr.DataArray
+            Variable to be mapped.
+        mapper : Mapper
+            Mapper supporting an `out` buffer, e.g. RawBinary or Lindstrom.
+        chunks : dict(str:int)
+            Chunk size for each dimension to be iterated over. Defaults to
+            single steps along `time` (or the first dimension).
+        dtype : np.dtype
+            Float type the chunks are converted to before mapping.
+
+        Returns
+        =======
+        result : generator(dict(str:slice), IntegerArray)
+            Position of the chunk in `dataarray` and the mapped chunk.
+        """
+        dataarray = _raiseTypeError(dataarray, xr.DataArray)
+        if not chunks:
+            dim = 'time' if 'time' in dataarray.dims else dataarray.dims[0]
+            chunks = {dim: 1}
+        missing = [x for x in chunks if x not in dataarray.dims]
+        if missing:
+            err = "{} not in DataArray".format(missing)
+            raise KeyError(err)
+        empty = fl.FloatArray(np.empty(0, dtype=dtype))
+        maxsize = np.prod([min(chunks.get(d, n), n) for d, n in
+                           zip(dataarray.dims, dataarray.shape)], dtype=int)
+        buffer = np.empty(maxsize, dtype=mapper.map(empty).array.dtype)
+        for sel in _chunkslices(dataarray, chunks):
+            chunk = dataarray.isel(**sel).values
+            chunk = chunk.astype(dtype, copy=False)
+            out = buffer[:chunk.size].reshape(chunk.shape)
+            yield sel, mapper.map(fl.FloatArray(chunk), out=out)
+
+    @staticmethod
+    def chunks_from_dataset(dataset, var, mapper, chunks=None,
+                            dtype=np.float32):
+        dataset = _raiseTypeError(dataset, xr.Dataset)
+        if not hasattr(dataset, var):
+            err = "{} not in Dataset".format(var)
+            raise KeyError(err)
+        dataarray = getattr(dataset, var)
+        return Reader.chunks_from_dataarray(dataarray, mapper, chunks, dtype)
+
+
+def _chunkslices(dataarray, chunks):
+    """Slices of all chunks of `dataarray` in C order."""
+    sizes = [(d, dataarray.sizes[d], s) for d, s in chunks.items()]
+    starts = product(*[range(0, n, s) for _, n, s in sizes])
+    for start in starts:
+        yield {d: slice(x, min(x + s, n)) for (d, n, s), x in zip(sizes, start)}
+
+
 def _raiseTypeError(obj, clas):
     if not isinstance(obj, clas):
         err = "Expected {}, got {}".format(clas, type(obj))
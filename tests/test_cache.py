@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Tests for the traversal order cache."""
+
+import os
+import pytest
+import numpy as np
+from pasc.toolbox.cache import OrderCache, SpaceStore, compact, spacekey
+from pasc.objects.integerarray import IntegerArray
+from pasc.modifier import sequencer as sq
+
+
+def test_compact_dtype():
+    assert compact(np.arange(10, dtype=np.int64)).dtype == np.int32
+    assert compact(np.array([0, 2**40])).dtype == np.int64
+
+
+def test_memory_hit():
+    cache = OrderCache()
+    calls = []
+    method = lambda: calls.append(1) or np.arange(5)
+    first = cache.get(('a', (5,), 0), method)
+    second = cache.get(('a', (5,), 0), method)
+    assert first is second
+    assert len(calls) == 1
+    assert not first.flags.writeable
+
+
+def test_memory_bound():
+    cache = OrderCache(maxbytes=100)
+    for i in range(5):
+        cache.get(i, lambda: np.arange(10))  # 40 bytes each
+    assert cache.nbytes <= 100
+    assert len(cache) == 2
+    assert 4 in cache and 3 in cache and 0 not in cache
+    _ = cache.get(('big',), lambda: np.arange(100))
+    assert ('big',) not in cache
+
+
+def test_disk_store(tmpdir):
+    cache = OrderCache(directory=str(tmpdir))
+    key = ('Blossom', (4, 4), 3, (('weights', ()),))
+    expected = cache.get(key, lambda: np.arange(16)[::-1])
+    assert os.path.isfile(cache.filename(key))
+
+    other = OrderCache(directory=str(tmpdir))
+    result = other.get(key, lambda: pytest.fail("Order not loaded from disk"))
+    assert isinstance(result, np.memmap)
+    assert np.array_equal(result, expected)
+
+
+SEQUENCER = [sq.Chequerboard, sq.Block, sq.Blossom,
+             sq.ChequerboardC, sq.BlockC, sq.BlossomC]
+
+
+@pytest.mark.parametrize('sequencer', SEQUENCER)
+def test_sequencer_uses_cache(sequencer, monkeypatch):
+    cache = OrderCache()
+    calls = []
+    get = cache.get
+    monkeypatch.setattr(cache, 'get', lambda key, method: get(
+        key, lambda: calls.append(key) or method()))
+    monkeypatch.setattr(sq, 'orders', cache)
+    iarr = IntegerArray(np.arange(30).reshape(5, 6))
+    first = sequencer.flatten(3, iarr)
+    second = sequencer.flatten(3, iarr)
+    assert len(calls) == 1
+    assert len(cache) == 1
+    assert np.array_equal(first.sequence, second.sequence)
+    assert np.array_equal(first.data, iarr.array.flat[first.sequence])
+
+
+def test_space_store(tmpdir):
+    from pasc.modifier.builder import OneDBuildBatch
+    iarr = IntegerArray(np.arange(30).reshape(5, 6))
+    seq = sq.BlossomC.flatten(3, iarr)
+    key = spacekey(seq, OneDBuildBatch, 2, sq.BlossomC, 3)
+    assert key[1:] == (sq.BlossomC.name, 3, 'OneDBuildBatch', 2)
+    assert spacekey(sq.Linear.flatten(0, iarr), OneDBuildBatch, 2)[0] != key[0]
+
+    store = SpaceStore(directory=str(tmpdir))
+    calls = []
+    method = lambda: calls.append(1) or OneDBuildBatch.build_infospaces(seq, 2)
+    first = store.get(key, method)
+    assert store.get(key, method) is first
+    assert os.path.isdir(store.filename(key))
+
+    other = SpaceStore(directory=str(tmpdir))
+    result = other.get(key, lambda: pytest.fail("Spaces not loaded from disk"))
+    assert isinstance(result.values, np.memmap)
+    assert np.array_equal(result.values, first.values)
+    assert np.array_equal(result.stepptr, first.stepptr)
+    assert len(calls) == 1
+
+
+def test_space_store_bound(tmpdir):
+    from pasc.modifier.builder import OneDBuildBatch
+    seq = sq.BlossomC.flatten(3, IntegerArray(np.arange(30).reshape(5, 6)))
+    method = lambda: OneDBuildBatch.build_infospaces(seq, 2)
+    store = SpaceStore(maxbytes=100, directory=str(tmpdir))
+    first = store.get('a', method)
+    assert 'a' not in store and store.nbytes == 0
+    assert store.get('a', method) is not first
+
+    other = SpaceStore(maxbytes=100, directory=str(tmpdir))
+    loaded = other.get('a', lambda: pytest.fail("Not loaded from disk"))
+    assert isinstance(loaded.values, np.memmap)
+    assert 'a' in other and other.nbytes == 0
+    assert other.get('a', method) is loaded
+
+
+def test_sequence_shares_cached_order(monkeypatch):
+    monkeypatch.setattr(sq, 'orders', OrderCache())
+    iarr = IntegerArray(np.arange(30).reshape(5, 6))
+    first = sq.BlossomC.flatten(3, iarr)
+    second = sq.BlossomC.flatten(3, iarr)
+    assert first.sequence is second.sequence
+    assert not first.sequence.flags.writeable
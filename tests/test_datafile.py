@@ -7,6 +7,8 @@ import pytest
 import numpy as np
 from pasc.objects import datafile, floatarray
 from pasc.toolbox import load_data
+from pasc.modifier.mapper import RawBinary
+from pasc.objects.integerarray import IntegerArray
 
 FILENAME = __file__
 NC_DATAFILENAME = resource('pasc', 'data/sresa1b_ncar_ccsm3-example.nc')
@@ -45,3 +47,38 @@ def test_from_file():
     assert np.array_equal(d.data, datafile.Datafile(NC_DATAFILENAME).data)
     assert np.array_equal(d.data, load_data('pre'))
     assert d == load_data('pre')
+
+
+CHUNKS = [None, {'time': 1}, {'lat': 50}, {'lat': 64, 'lon': 100}]
+
+
+@pytest.mark.parametrize('chunks', CHUNKS)
+def test_to_integerchunks(chunks):
+    df = datafile.Datafile(load_data('pre'))
+    expected = RawBinary.map(df.to_floatarray(var='tas')).array
+    result = np.zeros_like(expected)
+    buffers = set()
+    for sel, iarr in df.to_integerchunks('tas', RawBinary, chunks):
+        assert isinstance(iarr, IntegerArray)
+        result[tuple(sel.get(d, slice(None)) for d in df.data.tas.dims)] = iarr.array
+        buffers.add(iarr.array.__array_interface__['data'][0])
+    assert np.array_equal(result, expected)
+    assert len(buffers) == 1
+
+
+def test_to_integerchunks_dtype():
+    df = datafile.Datafile(load_data('pre'))
+    floats = df.to_floatarray(var='tas').array.astype(np.float64)
+    expected = RawBinary.map(floatarray.FloatArray(floats)).array
+    result = np.concatenate([
+        iarr.array.copy() for _, iarr in df.to_integerchunks(
+            'tas', RawBinary, {'time': 1}, dtype=np.float64)])
+    assert result.dtype == expected.dtype
+    assert np.array_equal(result.reshape(expected.shape), expected)
+
+
+def test_to_integerchunks_unknown_dimension():
+    df = datafile.Datafile(load_data('pre'))
+    with pytest.raises(KeyError) as err:
+        _ = list(df.to_integerchunks('tas', RawBinary, {'plev': 1}))
+    assert "not in DataArray" in str(err)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Tests for feeder objects."""
+
+import pytest
+import numpy as np
+from pasc.backend import CorePredictor
+from pasc.objects.integerarray import IntegerArray
+from pasc.objects.predictionarray import PredictionArray
+from pasc.modifier.sequencer import Linear, BlossomC
+from pasc.modifier.builder import (GeneralBuild, GeneralBuildBatch,
+                                  OneDBuildBatch, build_parallel)
+from pasc.objects.informationspace import PackedInformationSpaces
+from pasc.objects.informationcontext import InformationContext
+from pasc.modifier.subtractor import XOR
+from pasc.toolbox import feed, flood
+
+
+class Previous(CorePredictor):
+    """Last value predictor."""
+
+    name = 'Previous'
+
+    def __init__(self, *args, **kwargs):
+        self._prev = 0
+
+    def update(self, val):
+        self._prev = val
+
+    def predict(self):
+        return self._prev
+
+
+ARR = np.random.RandomState(3).randint(0, 2**20, (9, 14)).astype(np.int32)
+
+
+def test_tileslices():
+    tiles = list(feed.tileslices((5, 7), (2, 4)))
+    assert len(tiles) == 6
+    assert tiles[-1] == (slice(4, 5), slice(4, 7))
+    covered = np.zeros((5, 7), dtype=int)
+    for tile in tiles:
+        covered[tile] += 1
+    assert np.all(covered == 1)
+    with pytest.raises(ValueError):
+        _ = list(feed.tileslices((5, 7), (2,)))
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+@pytest.mark.parametrize('sequencer', [Linear, BlossomC])
+def test_tilefeeder(sequencer, processes):
+    feeder = feed.TileFeeder(Previous, sequencer, (4, 5), startidx=3,
+                             processes=processes)
+    name, result, layout = feeder.feed(IntegerArray(ARR))
+    assert isinstance(result, PredictionArray)
+    assert name == 'Previous'
+    assert len(layout.tiles) == 9
+    for tile, start, data in layout.split(ARR):
+        data = IntegerArray(np.ascontiguousarray(data))
+        assert start == min(3, data.array.size - 1)
+        seq = sequencer.flatten(start, data)
+        _, expected = feed.SeqFeeder(Previous).feed(seq)
+        assert np.array_equal(result.array[tile], expected.array)
+
+
+def test_tilefeeder_single_tile():
+    feeder = feed.TileFeeder(Previous, Linear, ARR.shape, processes=1)
+    _, result, layout = feeder.feed(IntegerArray(ARR))
+    _, expected = feed.SeqFeeder(Previous).feed(Linear.flatten(0, IntegerArray(ARR)))
+    assert result == expected
+    assert layout.starts == [0]
+
+
+def test_tilefeeder_residuals_per_tile():
+    feeder = feed.TileFeeder(Previous, Linear, (4, 5), startidx=7,
+                             processes=1)
+    _, prediction, layout = feeder.feed(IntegerArray(ARR))
+    residual = XOR.subtract(prediction, IntegerArray(ARR))
+    assert layout.starts[-1] == ARR[8:, 10:].size - 1
+    for tile, start, data in layout.split(residual.array):
+        seq = Linear.flatten(start, IntegerArray(ARR[tile].copy()))
+        _, expected = feed.SeqFeeder(Previous).feed(seq)
+        assert np.array_equal(data ^ expected.array, ARR[tile])
+
+
+def test_tilefeeder_no_tiles():
+    feeder = feed.TileFeeder(Previous, Linear, (4, 5), processes=1)
+    with pytest.raises(ValueError):
+        feeder.feed(IntegerArray(np.zeros((0, 5), dtype=np.int32)))
+
+
+def _space_equal(space, other):
+    if sorted(space.space) != sorted(other.space):
+        return False
+    for k, ctx in space.space.items():
+        arrs = [x.data for x in ctx.context]
+        others = [x.data for x in other.space[k].context]
+        if len(arrs) != len(others):
+            return False
+        if not all(np.array_equal(x, y) for x, y in zip(arrs, others)):
+            return False
+        infos = [x.info for x in ctx.context]
+        if infos != [x.info for x in other.space[k].context]:
+            return False
+    return True
+
+
+@pytest.mark.parametrize('restriction', [None, 1, 2])
+@pytest.mark.parametrize('shape', [(4, 5), (3, 4, 3)])
+def test_spacefeedergen_same_as_generalbuild(shape, restriction):
+    data = IntegerArray(ARR.flat[:np.prod(shape)].reshape(shape) % 50)
+    seq = BlossomC.flatten(2, data)
+    fillvalue = np.max(seq.data) + 1
+    arr = np.ones(seq.shape, dtype=seq.dtype) * flood.getNAN(seq.dtype)
+    feeder = feed.SpaceFeederGen(None)
+    for idx, (truth, space) in zip(seq.sequence, feeder.feed(seq, restriction)):
+        arr.flat[idx] = fillvalue
+        expected = GeneralBuild.build_infospace(arr, searchval=fillvalue,
+                                                restriction=restriction)
+        assert _space_equal(space, expected)
+        arr.flat[idx] = truth
+
+
+def test_knownruns():
+    runs = flood.KnownRuns((3, 6))
+    for coord in [(1, 1), (1, 3), (1, 2), (0, 2)]:
+        runs.reveal(coord)
+    assert runs.extent((1, 4)) == [(1, 1), (1, 4)]
+    assert runs.extent((2, 2)) == [(0, 2), (2, 2)]
+    assert runs.extent((1, 0)) == [(1, 1), (0, 3)]
+
+
+@pytest.mark.parametrize('restriction', [None, 0, 2])
+@pytest.mark.parametrize('shape', [(7,), (4, 5), (3, 4, 3)])
+def test_onedbuildbatch_same_as_spacefeeder1dma(shape, restriction):
+    data = IntegerArray(ARR.flat[:np.prod(shape)].reshape(shape))
+    seq = BlossomC.flatten(2, data)
+    packed = OneDBuildBatch.build_infospaces(seq, restriction)
+    feeder = feed.SpaceFeeder1DMA(None)
+    spaces = [space for _, space in feeder.feed(seq, restriction)]
+    assert len(packed) == len(spaces)
+    for expected, space in zip(spaces, packed):
+        assert _space_equal(space, expected)
+    nan = flood.getNAN(seq.dtype)
+    for c in range(packed.nanpos.size):
+        assert packed.context(c)[packed.nanpos[c]] == nan
+
+
+@pytest.mark.parametrize('restriction', [None, 0, 2])
+@pytest.mark.parametrize('shape', [(9, 14), (3, 4, 3), (20,)])
+def test_spacefeeder1dmask_same_as_spacefeeder1dma(shape, restriction):
+    data = IntegerArray(ARR.flat[:np.prod(shape)].reshape(shape))
+    seq = BlossomC.flatten(2, data)
+    expected = feed.SpaceFeeder1DMA(None).feed(seq, restriction)
+    result = feed.SpaceFeeder1DMask(None).feed(seq, restriction)
+    for (truth, space), (other, expect) in zip(result, expected):
+        assert truth == other
+        assert _space_equal(space, expect)
+
+
+@pytest.mark.parametrize('restriction', [None, 1])
+@pytest.mark.parametrize('shape', [(4, 5), (3, 4, 3)])
+def test_generalbuildbatch_same_as_spacefeedergen(shape, restriction):
+    data = IntegerArray(ARR.flat[:np.prod(shape)].reshape(shape))
+    seq = BlossomC.flatten(2, data)
+    packed = GeneralBuildBatch.build_infospaces(seq, restriction)
+    feeder = feed.SpaceFeederGen(None)
+    spaces = [space for _, space in feeder.feed(seq, restriction)]
+    assert len(packed) == len(spaces)
+    for expected, space in zip(spaces, packed):
+        assert _space_equal(space, expected)
+    half = seq.sequence.size // 2
+    chunk = GeneralBuildBatch.build_infospaces(seq, restriction, start=half)
+    assert len(chunk) == len(spaces) - half
+    for expected, space in zip(spaces[half:], chunk):
+        assert _space_equal(space, expected)
+
+
+def test_packedinformationspaces_save_load(tmpdir):
+    data = IntegerArray(ARR.flat[:36].reshape(3, 4, 3))
+    seq = BlossomC.flatten(2, data)
+    packed = GeneralBuildBatch.build_infospaces(seq)
+    packed.save(str(tmpdir))
+    loaded = PackedInformationSpaces.load(str(tmpdir))
+    assert isinstance(loaded.values, np.memmap)
+    assert loaded.dims == packed.dims
+    assert len(loaded) == len(packed)
+    for space, other in zip(loaded, packed):
+        assert _space_equal(space, other)
+
+
+def test_spacefeederstore_replays_for_aggregate(tmpdir):
+    from pasc.toolbox.cache import SpaceStore
+    from pasc.toolbox.manager import Aggregate, AverageManager
+    data = IntegerArray(ARR[:6, :7])
+    seq = BlossomC.flatten(2, data)
+    store = SpaceStore(directory=str(tmpdir))
+    feeder = feed.SpaceFeederStore(OneDBuildBatch, sequencer=BlossomC,
+                                   startidx=2, store=store)
+    _, expected = Aggregate(feed.SpaceFeeder1DMA(None),
+                            AverageManager(Previous, 4), 1,
+                            restriction=2).feed(seq)
+    for _ in range(2):
+        _, result = Aggregate(feeder, AverageManager(Previous, 4), 1,
+                              restriction=2).feed(seq)
+        assert np.array_equal(result.array, expected.array)
+    assert len(store) == 1
+    assert len(tmpdir.listdir()) == 1
+
+
+@pytest.mark.parametrize('builder', [OneDBuildBatch, GeneralBuildBatch])
+def test_build_parallel_same_as_sequential(builder):
+    data = IntegerArray(ARR[:6, :7])
+    seq = BlossomC.flatten(2, data)
+    expected = builder.build_infospaces(seq, 2)
+    result = build_parallel(builder, seq, 2, processes=2)
+    assert result.dims == expected.dims
+    for name in PackedInformationSpaces.buffers:
+        if getattr(expected, name) is None:
+            assert getattr(result, name) is None
+            continue
+        assert np.array_equal(getattr(result, name), getattr(expected, name))
+
+
+def _space_set(space, dims=None):
+    dims = sorted(space.space) if dims is None else dims
+    return {k: sorted((x.data.shape, x.data.tobytes(), sorted(x.info.items()))
+                      for x in space[k].context) for k in dims}
+
+
+@pytest.mark.parametrize('restriction', [None, 1])
+@pytest.mark.parametrize('shape', [(4, 5), (3, 4, 3)])
+def test_spacefeedergen_lazy(shape, restriction):
+    data = IntegerArray(ARR.flat[:np.prod(shape)].reshape(shape))
+    seq = BlossomC.flatten(2, data)
+    expected = feed.SpaceFeederGen(None).feed(seq, restriction)
+    result = feed.SpaceFeederGen(None, lazy=True).feed(seq, restriction)
+    for (truth, space), (other, expect) in zip(result, expected):
+        assert truth == other
+        assert _space_set(space, [1]) == _space_set(expect, [1])
+        assert len(space._space) == 1  # Only 1D contexts were computed
+        assert _space_set(space) == _space_set(expect)
+
+
+def test_lazy_space_computes_on_access():
+    from pasc.objects.informationspace import LazyInformationSpace
+    calls = []
+    contexts = {0: [], 1: [np.array([3, flood.getNAN(np.dtype(int)), 4])]}
+    space = LazyInformationSpace([0, 1], lambda dim: calls.append(dim) or [
+        InformationContext.create(data=x) for x in contexts[dim]])
+    assert space[1] is space[1]
+    assert calls == [1]
+    assert sorted(space.space) == [0, 1]
+    assert calls == [1, 0]
+    with pytest.raises(KeyError):
+        _ = space[2]
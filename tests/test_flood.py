@@ -3,8 +3,129 @@
 """Tests for flood module."""
 
 from pasc.toolbox import flood as fl
+import numpy as np
 import pytest
 
 
 def test_NoneT():
     assert str(fl.NoneT()) == 'All'
+
+
+def _withnans(shape, seed):
+    rng = np.random.RandomState(seed)
+    data = rng.permutation(int(np.prod(shape))).reshape(shape).astype(np.int64)
+    data[rng.rand(*shape) < 0.3] = fl.getNAN(data.dtype)
+    return data
+
+
+def test_fence():
+    data = np.arange(20, dtype=np.int64).reshape(4, 5)
+    nan = fl.getNAN(data.dtype)
+    data[0, 2] = data[2, 4] = data[2, 0] = nan
+    expected = data[0:4, 0:4]
+    assert np.array_equal(fl.fence(12, data), expected)
+    assert np.array_equal(fl.fence(12, data, fl.nanDistances(data)), expected)
+
+
+@pytest.mark.parametrize('shape', [(7,), (4, 6), (3, 4, 5)])
+@pytest.mark.parametrize('seed', range(3))
+def test_fence_with_distances(shape, seed):
+    data = _withnans(shape, seed)
+    distances = fl.nanDistances(data)
+    for val in data[data != fl.getNAN(data.dtype)]:
+        assert np.array_equal(fl.fence(val, data),
+                              fl.fence(val, data, distances))
+
+
+@pytest.mark.parametrize('shape', [(7,), (4, 6), (3, 4, 5)])
+def test_knownruns_from_array(shape):
+    data = _withnans(shape, 0)
+    nan = fl.getNAN(data.dtype)
+    runs = fl.KnownRuns(shape)
+    for idx in np.random.RandomState(1).permutation(data.size):
+        if data.flat[idx] != nan:
+            runs.reveal(np.unravel_index(idx, shape))
+    expected = fl.KnownRuns.from_array(data)
+    for coord in np.argwhere(data == nan):
+        assert runs.extent(tuple(coord)) == expected.extent(tuple(coord))
+
+
+@pytest.mark.parametrize('restriction', [0, 1, 2])
+@pytest.mark.parametrize('shape', [(7,), (4, 6), (3, 4, 5)])
+def test_fence_with_restriction(shape, restriction):
+    data = _withnans(shape, 2)
+    for coord in np.argwhere(data != fl.getNAN(data.dtype)):
+        window = tuple(slice(max(0, x - restriction), x + restriction + 1)
+                       for x in coord)
+        val = data[tuple(coord)]
+        expected = fl.fence(val, data[window])
+        assert np.array_equal(fl.fence(val, data, restriction=restriction),
+                              expected)
+        assert np.array_equal(fl.fence(val, data, restriction=restriction,
+                                       origin=tuple(coord)), expected)
+
+
+def test_getblocks():
+    data = np.arange(12, dtype=np.int64).reshape(3, 4)
+    data.flat[0] = data.flat[-1] = fl.getNAN(data.dtype)
+    blocks = fl.getBlocks(data, 5)
+    expected = [data[:, 1:3], data[1:, :3], data[:2, 1:], data[1:2, :]]
+    assert len(blocks) == len(expected)
+    for block in expected:
+        assert sum(np.array_equal(block, x) for x in blocks) == 1
+    for block in blocks:
+        assert not np.may_share_memory(block, data)
+
+
+def test_get_supers():
+    arrs = [np.array([1, 2]), np.array([[2, 3], [4, 5]]), np.array([2, 1, 3]),
+            np.array([5, 4]), np.array([3, 2, 1]), np.array([6])]
+    result = fl.get_supers(arrs)
+    assert [x.tolist() for x in result] == [[6], [3, 2, 1], [[2, 3], [4, 5]]]
+
+
+def test_interner():
+    interned = fl.Interner(maxbytes=2 * 96)  # Two arrays of 48 bytes
+    arr = np.arange(6, dtype=np.int64)
+    first = interned.intern(arr)
+    assert arr.flags.writeable
+    assert not first.array.flags.writeable
+    assert interned.intern(arr.copy()) is first
+    assert interned.hashed(first.array) is first
+    assert interned.intern(arr.reshape(2, 3)) is not first
+    assert interned.intern(arr.view(np.uint64)) is not first
+    assert len(interned) == 2
+    assert interned.intern(arr) is not first
+    assert interned.nbytes <= interned.maxbytes
+
+
+def test_interner_owned():
+    interned = fl.Interner()
+    arr = np.arange(6, dtype=np.int64)
+    first = interned.intern(arr, owned=True)
+    assert first.array is arr
+    assert not arr.flags.writeable
+    other = np.arange(6, dtype=np.int64)
+    assert interned.intern(other, owned=True) is first
+    assert other.flags.writeable
+
+
+def test_interner_bound():
+    interned = fl.Interner(maxbytes=1000)
+    for i in range(100):
+        interned.intern(np.arange(i, i + 10, dtype=np.int64))
+    assert interned.nbytes <= 1000
+    assert len(interned) == 6
+    big = interned.intern(np.arange(100, dtype=np.int64))
+    assert not big.array.flags.writeable
+    assert interned.hashed(big.array) is not big
+    assert len(interned) == 6
+    interned.clear()
+    assert interned.nbytes == 0 and len(interned) == 0
+
+
+def test_wrapper_collision():
+    first, second = fl._wrapper(np.arange(3)), fl._wrapper(np.arange(1, 4))
+    second._hash = first._hash
+    assert first != second
+    assert len(fl.uniqueNDs([np.arange(3), np.arange(3), np.arange(1, 4)])) == 2
@@ -138,3 +138,129 @@ def test_not_fully_connected_graph(adjmatrix):
     named = gt.nameAdjMatrix(adjmatrix, mode='n')
     _, result = gt.search.BFSmatrix(adjmatrix=named, startnode='1')
     assert len(result) == pd.np.sqrt(named.size)
+
+
+CSR_SETUPS = [
+    ((3, 4), 1, {}),
+    ((3, 4), [1, 2], {(0, 1): 3, (-1, 0): 2}),
+    ((2, 3, 4), [1, 3], {(1, 1, 1): 5}),
+]
+
+
+@pytest.mark.parametrize('shape,distance,weights', CSR_SETUPS)
+def test_csr_adjmatrix_at_distance(shape, distance, weights):
+    from pasc.toolbox import bfs
+    matrix = gt.adjacency.csrAdjMatrixAtDistance(distance, shape, weights)
+    dist = tuple(distance) if isinstance(distance, list) else (distance,)
+    N = int(pd.np.prod(shape))
+    assert matrix.shape == (N, N)
+    for idx in range(N):
+        expected = bfs.neighbour_idx(idx, dist, shape,
+                                     bfs.pack_weights(weights))
+        row = matrix.getrow(idx)
+        assert dict(zip(row.indices, row.data)) == expected
+
+
+@pytest.mark.parametrize('shape,weights', [((3, 4), {}),
+                                            ((3, 4), {(0, 1): 3, (-1, 0): 2}),
+                                            ((2, 2, 3), {(0, 0, 1): 4})])
+def test_wadjlist2csr_same_as_adjmatrix(shape, weights):
+    from pasc.toolbox.graphtheory.elements import Cell, Direction
+    adjlist = gt.adjacency.generateAdjListAtDistance(1, shape)
+    weights = {Direction(k): v for k, v in weights.items()}
+    wadjlist = gt.adjacency.addweights(adjlist, weights, 1)
+    matrix = gt.adjacency.wadjlist2csr(wadjlist, shape)
+    dense = gt.adjacency.wadjlist2adjmatrix(wadjlist, shape)
+
+    def flat(label):
+        return label.index(shape) if isinstance(label, Cell) else int(label) - 1
+
+    N = int(pd.np.prod(shape))
+    expected = pd.np.zeros((N, N))
+    for row, values in dense.iterrows():
+        for column, value in values.items():
+            if not pd.isnull(value) and value:
+                expected[flat(row), flat(column)] = value
+    assert matrix.shape == (N, N)
+    assert matrix.nnz == pd.np.count_nonzero(expected)
+    assert (matrix.toarray() == expected).all()
+
+
+@pytest.mark.parametrize('adjmatrix', ADJMATRICES + NOT_FULLY_CONNECTED_GRAPH)
+def test_csr_conversion(adjmatrix):
+    named = gt.nameAdjMatrix(adjmatrix, mode='n')
+    matrix = gt.adjacency.adjmatrix2csr(named)
+    assert (matrix.toarray() == pd.np.array(adjmatrix)).all()
+    assert gt.adjacency.csr2adjmatrix(matrix).equals(named)
+
+
+SEARCHES = [gt.search.BFSmatrix, gt.search.DFS]
+
+
+@pytest.mark.parametrize('method', SEARCHES)
+@pytest.mark.parametrize('adjmatrix', ADJMATRICES + NOT_FULLY_CONNECTED_GRAPH)
+def test_csr_search_same_as_dataframe(method, adjmatrix):
+    named = gt.nameAdjMatrix(adjmatrix, mode='n')
+    matrix = gt.adjacency.adjmatrix2csr(named)
+    for start in range(len(adjmatrix)):
+        _, expected = method(adjmatrix=named, startnode=str(start + 1))
+        _, result = method(adjmatrix=matrix, startnode=start)
+        assert list(result) == [int(x) - 1 for x in expected]
+
+
+@pytest.mark.parametrize('method', SEARCHES)
+@pytest.mark.parametrize('seed', range(5))
+def test_csr_search_random_weights(method, seed):
+    named = gt.random.namedAdjMatrixGenerator(N=9, seed=seed, limits=(0, 3),
+                                              mode='n')
+    _, expected = method(adjmatrix=named, startnode='4')
+    matrix = gt.adjacency.adjmatrix2csr(named)
+    _, result = method(adjmatrix=matrix, startnode=3)
+    assert list(result) == [int(x) - 1 for x in expected]
+
+
+BATCH_SETUPS = [
+    ((4,), 1),
+    ((3, 4), 1),
+    ((3, 4), 2),
+    ((2, 3, 4), 3),
+]
+
+
+@pytest.mark.parametrize('shape,distance', BATCH_SETUPS)
+def test_cellbatch_same_as_cell(shape, distance):
+    from pasc.toolbox.graphtheory.elements.cells import fromIdx, fromIndices
+    N = int(pd.np.prod(shape))
+    batch = fromIndices(pd.np.arange(N), shape)
+    assert batch.valid(shape).all()
+    assert list(batch.index(shape)) == list(range(N))
+    indptr, indices = batch.neighbourIndicesAtDistance(distance, shape)
+    for idx in range(N):
+        cell = fromIdx(idx=idx, shape=shape, value=None)
+        expected = [int(x.index(shape))
+                    for x in cell.neighboursAtDistance(distance, shape)]
+        assert list(indices[indptr[idx]:indptr[idx + 1]]) == expected
+
+
+BFSLISTS = zip(ADJMATRICES + NOT_FULLY_CONNECTED_GRAPH,
+               [[0, 1, 4, 2, 3], [0, 1, 4, 3, 2], [0, 1, 4, 2, 3],
+                [0, 1, 4, 2, 3]])
+
+
+@pytest.mark.parametrize('adjmatrix,expected', BFSLISTS)
+def test_bfslist(adjmatrix, expected):
+    adjlist = {k: [x for x in range(len(row)) if row[x] > 0]
+               for k, row in enumerate(adjmatrix)}
+    _, result = gt.search.BFSlist(adjlist=adjlist, startnode=0)
+    assert list(result) == expected
+
+
+COMPONENTS = zip(NOT_FULLY_CONNECTED_GRAPH,
+                 [[0, 0, 1, 0, 0], [0, 0, 1, 2, 0], [0, 0, 1, 1, 0]])
+
+
+@pytest.mark.parametrize('adjmatrix,expected', COMPONENTS)
+def test_components(adjmatrix, expected):
+    named = gt.nameAdjMatrix(adjmatrix, mode='n')
+    labels = gt.search.components(named, startnode='1')
+    assert list(labels) == expected
@@ -56,3 +56,99 @@ def test_wrong_input_group(inputgroup, mapper):
     with pytest.raises(TypeError) as err:
         _ = mapper.map(inputgroup)
     assert "Expected FloatArray, got" in str(err)
+
+
+RAWBINARY_INPUT = [
+    np.array([-1.5, 0, 2.25, np.nan, -0., np.inf], dtype=np.float32),
+    np.array([-1.5, 0, 2.25, np.nan, -0., np.inf], dtype=np.float64),
+    np.linspace(-1e5, 1e5, 24, dtype=np.float32).reshape(2, 3, 4),
+]
+
+
+@pytest.mark.parametrize('arr', RAWBINARY_INPUT)
+def test_rawbinary_struct_reference(arr):
+    """Mapping via dtype view equals mapping via struct."""
+    if arr.dtype == np.float32:
+        i, o, d = ('>f', '>l', np.int32)
+    else:
+        i, o, d = ('>d', '>q', np.int64)
+    expected = np.array([mapper._raw(x, i, o) for x in arr.flat],
+                        dtype=d).reshape(arr.shape)
+    result = mapper.RawBinary.map(FloatArray(arr))
+    assert result.array.dtype == d
+    assert np.array_equal(result.array, expected)
+
+
+@pytest.mark.parametrize('arr', RAWBINARY_INPUT)
+def test_rawbinary_unmap(arr):
+    iarr = mapper.RawBinary.map(FloatArray(arr))
+    result = mapper.RawBinary.unmap(iarr)
+    assert isinstance(result, FloatArray)
+    assert result.array.dtype == arr.dtype
+    assert np.array_equal(result.array.view(iarr.array.dtype), iarr.array)
+
+
+def test_rawbinary_out_buffer():
+    arr = np.arange(24, dtype=np.float32).reshape(4, 6)
+    out = np.empty(arr.shape, dtype=np.int32)
+    for step in range(3):
+        result = mapper.RawBinary.map(FloatArray(arr + step), out=out)
+        assert result.array is out
+        assert np.array_equal(out, (arr + step).view(np.int32))
+    with pytest.raises(ValueError):
+        _ = mapper.RawBinary.map(FloatArray(arr), out=out.astype(np.int64))
+
+
+def test_rawbinary_byteorder():
+    arr = np.linspace(-3, 3, 7, dtype='>f4')
+    result = mapper._reinterpret(arr, np.dtype(np.int32))
+    assert result.dtype.isnative
+    assert np.array_equal(result, arr.astype(np.float32).view(np.int32))
+
+
+LINDSTROM_INPUT = [
+    np.array([-1.5, 0, 2.25, np.nan, -0., np.inf, -np.inf, 2., -2.],
+             dtype=np.float32),
+    np.array([-1.5, 0, 2.25, np.nan, -0., np.inf, -np.inf, 2., -2.],
+             dtype=np.float64),
+    np.random.RandomState(42).standard_normal((3, 4, 5)).astype(np.float32),
+    np.random.RandomState(42).standard_normal((3, 4, 5)) * 1e200,
+]
+
+
+@pytest.mark.parametrize('arr', LINDSTROM_INPUT)
+def test_lindstrom_bitstring_reference(arr):
+    """Bitwise mapping equals mapping via bitstring."""
+    length, d = (32, np.uint32) if arr.dtype == np.float32 else (64, np.uint64)
+    expected = np.array([mapper._lindstrom(x, length) for x in arr.flat],
+                        dtype=d).reshape(arr.shape)
+    result = mapper.Lindstrom.map(FloatArray(arr))
+    assert result.array.dtype == d
+    assert np.array_equal(result.array, expected)
+
+
+@pytest.mark.parametrize('arr', LINDSTROM_INPUT)
+def test_lindstrom_unmap(arr):
+    iarr = mapper.Lindstrom.map(FloatArray(arr))
+    result = mapper.Lindstrom.unmap(iarr)
+    assert isinstance(result, FloatArray)
+    assert result.array.dtype == arr.dtype
+    assert np.array_equal(result.array.view(iarr.array.dtype),
+                          arr.view(iarr.array.dtype))
+
+
+def test_lindstrom_order_preserving():
+    arr = np.sort(LINDSTROM_INPUT[2].flatten())
+    result = mapper.Lindstrom.map(FloatArray(arr)).array
+    assert np.all(np.diff(result.astype(np.int64)) > 0)
+
+
+def test_lindstrom_out_buffer():
+    arr = LINDSTROM_INPUT[2]
+    out = np.empty(arr.shape, dtype=np.uint32)
+    result = mapper.Lindstrom.map(FloatArray(arr), out=out)
+    assert result.array is out
+    back = np.empty(arr.shape, dtype=np.float32)
+    result = mapper.Lindstrom.unmap(result, out=back)
+    assert np.shares_memory(result.array, back)
+    assert np.array_equal(back, arr)
@@ -2,7 +2,7 @@
 # coding: utf-8
 """Tests for Sequence objects."""
 
-from pasc.objects.sequence import Sequence
+from pasc.objects.sequence import Sequence, IndexSequence
 import numpy as np
 import pytest
 
@@ -52,3 +52,40 @@ def test_invalid_string_input():
     with pytest.raises(TypeError) as err:
         _ = Sequence("iobj", "sdf", "sdf")
     assert "String not" in str(err)
+
+
+def _indexsequence():
+    arr = np.random.RandomState(1).randint(0, 100, (4, 5))
+    order = np.random.RandomState(2).permutation(arr.size)
+    return IndexSequence(order, arr.shape, arr.flat[order]), arr
+
+
+def test_inverse():
+    seq, _ = _indexsequence()
+    assert np.array_equal(seq.inverse[seq.sequence], np.arange(20))
+    assert seq.inverse is seq.inverse
+    seq.sequence = seq.sequence[::-1]
+    assert np.array_equal(seq.inverse[seq.sequence], np.arange(20))
+
+
+def test_unflatten_and_gather():
+    seq, arr = _indexsequence()
+    assert np.array_equal(seq.unflatten(seq.data), arr)
+    assert np.array_equal(seq.gather(arr), seq.data)
+    partial = IndexSequence(seq.sequence[:5], arr.shape, seq.data[:5])
+    expected = np.zeros_like(arr)
+    expected.flat[partial.sequence] = partial.data
+    assert np.array_equal(partial.unflatten(partial.data), expected)
+
+
+def test_unflatten_chunks():
+    seq, arr = _indexsequence()
+    out = np.zeros_like(arr)
+    for offset in range(0, 20, 6):
+        chunk = seq.gather(arr, offset, 6)
+        assert np.array_equal(chunk, seq.data[offset:offset + 6])
+        result = seq.unflatten(chunk, offset=offset, out=out)
+        assert result is out
+    assert np.array_equal(out, arr)
+    with pytest.raises(ValueError):
+        _ = seq.unflatten(np.arange(6), offset=18)
@@ -7,7 +7,8 @@ import numpy as np
 from pasc.objects.integerarray import IntegerArray
 from pasc.objects.sequence import Sequence
 from pasc.modifier.sequencer import Linear, Block
-from pasc.modifier.sequencer import Chequerboard, Blossom
+from pasc.modifier.sequencer import Chequerboard, Blossom, Morton, Hilbert
+from pasc.toolbox import bfs
 
 
 SEQUENCER = {
@@ -61,3 +62,83 @@ EXPECTED_LINEAR = {
 def test_expected_Linear(ival):
     seq = Linear.flatten(1, INTEGERARRAYS[ival], ORDER[ival])
     assert np.array_equal(seq.sequence, EXPECTED_LINEAR[ival])
+
+
+@pytest.mark.parametrize('startidx', [0, 7, 26])
+@pytest.mark.parametrize('order', [None, 'C', 'F', (2, 0, 1)])
+def test_Linear_start_and_data(startidx, order):
+    arr = np.random.randint(0, 100, 27).reshape(3, 3, 3)
+    seq = Linear.flatten(startidx, IntegerArray(arr), order)
+    assert seq.sequence[0] == startidx
+    assert np.array_equal(np.sort(seq.sequence), np.arange(27))
+    assert np.array_equal(seq.data, arr.flat[seq.sequence])
+    assert seq.data.dtype == arr.dtype
+
+
+# Orders as produced by the deque based BFS implementation
+EXPECTED_BFS = [
+    (bfs.BFSCheq, (4, 5), 3,
+     [3, 7, 9, 1, 11, 13, 5, 15, 17, 19, 4, 8, 2, 12, 14, 6, 16, 18, 0, 10]),
+    (bfs.BFSBloc, (3, 3), 4, [4, 0, 1, 5, 2, 7, 3, 6, 8]),
+    (bfs.BFSBlos, (3, 3), 4, [4, 1, 7, 3, 0, 2, 6, 5, 8]),
+    (bfs.BFSBlos, (2, 3, 3), 4,
+     [4, 13, 1, 7, 3, 5, 12, 0, 6, 14, 2, 9, 15, 11, 17, 10, 16, 8]),
+]
+
+
+@pytest.mark.parametrize('method,shape,startidx,expected', EXPECTED_BFS)
+def test_expected_weighted_bfs(method, shape, startidx, expected):
+    _, order = method(shape=shape, startidx=startidx, weights=())
+    assert list(order) == expected
+
+
+@pytest.mark.parametrize('method', [bfs.BFSCheq, bfs.BFSBloc, bfs.BFSBlos])
+def test_weighted_bfs_restarts_before_startidx(method):
+    _, order = method(shape=(6, 7), startidx=41, weights=())
+    assert order[0] == 41
+    assert np.array_equal(np.sort(order), np.arange(42))
+
+
+@pytest.mark.parametrize('distance', [(1,), (2,), (1, 2, 3)])
+@pytest.mark.parametrize('shape', [(7,), (4, 5), (3, 4, 2)])
+def test_neighbourtable_equals_neighbour_idx(shape, distance):
+    table = bfs.NeighbourTable(shape, distance)
+    assert table.indptr.size == np.prod(shape) + 1
+    for idx in range(int(np.prod(shape))):
+        expected = bfs.neighbour_idx(idx, distance, shape, ())
+        assert list(table[idx]) == list(expected)
+
+
+@pytest.mark.parametrize('method', [bfs.CheqNoWeights, bfs.BlosNoWeights,
+                                    bfs.BlocNoWeights])
+def test_classic_bfs_visits_all(method):
+    order = list(method((5, 6), 2))
+    assert order[0] == 2
+    assert sorted(order) == list(range(30))
+
+
+CURVE_SHAPES = [(8,), (8, 8), (4, 4, 4), (5, 7), (3, 5, 6), (2, 3, 2, 3)]
+
+
+@pytest.mark.parametrize('shape', CURVE_SHAPES)
+@pytest.mark.parametrize('sequencer', [Morton, Hilbert])
+def test_curves_visit_all(sequencer, shape):
+    arr = np.random.randint(0, 100, shape)
+    startidx = int(np.prod(shape)) // 2
+    seq = sequencer.flatten(startidx, IntegerArray(arr))
+    assert seq.sequence[0] == startidx
+    assert np.array_equal(np.sort(seq.sequence), np.arange(arr.size))
+    assert np.array_equal(seq.data, arr.flat[seq.sequence])
+
+
+@pytest.mark.parametrize('shape', [(8,), (8, 8), (4, 4, 4), (2, 2, 2, 2)])
+def test_hilbert_is_continuous(shape):
+    seq = Hilbert.flatten(0, IntegerArray(np.zeros(shape, dtype=int)))
+    coords = np.array(np.unravel_index(seq.sequence, shape))
+    assert np.all(np.abs(np.diff(coords, axis=1)).sum(axis=0) == 1)
+
+
+def test_expected_morton():
+    seq = Morton.flatten(0, IntegerArray(np.zeros((4, 4), dtype=int)))
+    expected = [0, 1, 4, 5, 2, 3, 6, 7, 8, 9, 12, 13, 10, 11, 14, 15]
+    assert list(seq.sequence) == expected